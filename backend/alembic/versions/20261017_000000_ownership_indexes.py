@@ -0,0 +1,73 @@
+"""Composite and unique indexes for ownership and history lookups
+
+Revision ID: 002_ownership_indexes
+Revises: 001_initial
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '002_ownership_indexes'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, unique) - built CONCURRENTLY so writes keep flowing
+INDEXES = [
+    # Ownership checks: user_id = ? AND product_id = ?
+    ('uq_user_library', 'user_library', ['user_id', 'product_id'], True),
+    # Library listing and stats: user_id = ? ORDER BY purchased_at DESC
+    ('ix_user_library_user_id_purchased_at', 'user_library', ['user_id', 'purchased_at'], False),
+    # Order fulfilment and receipts: order_id = ?
+    ('ix_order_items_order_id', 'order_items', ['order_id'], False),
+    # Order history: user_id = ? ORDER BY created_at DESC
+    ('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], False),
+    # Recent chat sessions: user_id = ? ORDER BY started_at DESC
+    ('ix_chat_sessions_user_id_started_at', 'chat_sessions', ['user_id', 'started_at'], False),
+    # Session history: session_id = ? ORDER BY created_at
+    ('ix_chat_messages_session_id_created_at', 'chat_messages', ['session_id', 'created_at'], False),
+]
+
+# Single-column indexes that the composites above make redundant
+REPLACED_INDEXES = [
+    ('ix_user_library_user_id', 'user_library', ['user_id']),
+    ('ix_chat_sessions_user_id', 'chat_sessions', ['user_id']),
+    ('ix_chat_messages_session_id', 'chat_messages', ['session_id']),
+]
+
+
+def upgrade() -> None:
+    # Databases created with create_all() never got uq_user_library, so
+    # drop duplicate ownership rows (keeping the first purchase) first
+    op.execute("""
+        DELETE FROM user_library a
+        USING user_library b
+        WHERE a.user_id = b.user_id
+          AND a.product_id = b.product_id
+          AND (a.purchased_at, a.id) > (b.purchased_at, b.id)
+    """)
+
+    # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name, table, columns,
+                unique=unique,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, columns in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        # uq_user_library belongs to the initial schema, so it stays
+        for name, table, columns, unique in reversed(INDEXES[1:]):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,36 @@
+"""Index for keyset pagination of the published catalog
+
+Revision ID: 003_catalog_keyset_index
+Revises: 002_ownership_indexes
+Create Date: 2026-10-17 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003_catalog_keyset_index'
+down_revision: Union[str, None] = '002_ownership_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # list_products orders by (grade, term, id) and seeks past a cursor
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_published_grade_term_id', 'products', ['grade', 'term', 'id'],
+            postgresql_where=sa.text('is_published'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_products_published_grade_term_id', table_name='products',
+            postgresql_concurrently=True, if_exists=True,
+        )
@@ -0,0 +1,96 @@
+"""Full-text search vector and trigram index for the catalog
+
+Revision ID: 004_catalog_search
+Revises: 003_catalog_keyset_index
+Create Date: 2026-10-17 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '004_catalog_search'
+down_revision: Union[str, None] = '003_catalog_keyset_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # A generated column can't read subjects.name, so a trigger keeps the
+    # vector current: title and subject weigh most, then short description
+    # and topic titles, then the full description
+    op.execute("""
+        CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(
+                    (SELECT name FROM subjects WHERE id = NEW.subject_id), '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(NEW.short_description, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(
+                    (SELECT string_agg(topic #>> '{}', ' ')
+                     FROM jsonb_path_query(NEW.content_json, '$.units[*].topics[*].title') AS topic), '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER products_search_vector
+        BEFORE INSERT OR UPDATE OF title, description, short_description, subject_id, content_json
+        ON products
+        FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+    """)
+
+    # Renaming a subject re-indexes its products
+    op.execute("""
+        CREATE OR REPLACE FUNCTION subjects_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE products SET subject_id = subject_id WHERE subject_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER subjects_search_vector
+        AFTER UPDATE OF name ON subjects
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+        EXECUTE FUNCTION subjects_search_vector_update()
+    """)
+
+    # Backfill existing rows through the trigger
+    op.execute("UPDATE products SET title = title")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_search_vector', 'products', ['search_vector'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Typo-tolerant fallback: title % 'query'
+        op.create_index(
+            'ix_products_title_trgm', 'products', ['title'],
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_title_trgm', table_name='products', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True, if_exists=True)
+
+    op.execute("DROP TRIGGER IF EXISTS subjects_search_vector ON subjects")
+    op.execute("DROP FUNCTION IF EXISTS subjects_search_vector_update()")
+    op.execute("DROP TRIGGER IF EXISTS products_search_vector ON products")
+    op.execute("DROP FUNCTION IF EXISTS products_search_vector_update()")
+    op.drop_column('products', 'search_vector')
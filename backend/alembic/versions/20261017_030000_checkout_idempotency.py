@@ -0,0 +1,42 @@
+"""Idempotency key on orders for checkout retries
+
+Revision ID: 005_checkout_idempotency
+Revises: 004_catalog_search
+Create Date: 2026-10-17 03:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005_checkout_idempotency'
+down_revision: Union[str, None] = '004_catalog_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable with no default, so this doesn't rewrite the table
+    op.add_column('orders', sa.Column('idempotency_key', sa.String(100), nullable=True))
+    op.add_column('orders', sa.Column('idempotency_request_hash', sa.String(64), nullable=True))
+
+    # Also the arbiter for INSERT ... ON CONFLICT in checkout
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_orders_user_id_idempotency_key', 'orders', ['user_id', 'idempotency_key'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_orders_user_id_idempotency_key', table_name='orders',
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column('orders', 'idempotency_request_hash')
+    op.drop_column('orders', 'idempotency_key')
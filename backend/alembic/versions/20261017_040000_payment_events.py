@@ -0,0 +1,49 @@
+"""Payment event outbox
+
+Revision ID: 006_payment_events
+Revises: 005_checkout_idempotency
+Create Date: 2026-10-17 04:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '006_payment_events'
+down_revision: Union[str, None] = '005_checkout_idempotency'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'payment_events',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('provider', sa.String(20), nullable=False),
+        sa.Column('provider_payment_id', sa.String(100), nullable=False),
+        sa.Column('order_number', sa.String(30), nullable=False),
+        sa.Column('payment_status', sa.String(30), nullable=False),
+        sa.Column('payload', postgresql.JSONB, nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime, nullable=False, server_default=sa.text("(NOW() AT TIME ZONE 'utc')")),
+        sa.Column('last_error', sa.Text, nullable=True),
+        sa.Column('received_at', sa.DateTime, nullable=False, server_default=sa.text("(NOW() AT TIME ZONE 'utc')")),
+        sa.Column('processed_at', sa.DateTime, nullable=True),
+        sa.UniqueConstraint(
+            'provider', 'provider_payment_id', 'payment_status',
+            name='uq_payment_events_provider_payment_status',
+        ),
+    )
+    op.create_index(
+        'ix_payment_events_queue', 'payment_events', ['status', 'next_attempt_at'],
+        postgresql_where=sa.text("status <> 'done'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payment_events_queue', table_name='payment_events')
+    op.drop_table('payment_events')
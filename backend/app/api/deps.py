@@ -3,18 +3,28 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
-from app.core.database import get_db
-from app.core.security import decode_token
+from app.core.database import get_db, get_readonly_db
+from app.core.user_cache import user_cache
 from app.models import User, UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
-async def get_current_user(
-    token: Optional[str] = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get the current authenticated user."""
+async def load_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    """Load a user into the session, from the per-worker cache when possible."""
+    snapshot = user_cache.get_user(user_id)
+    if snapshot is not None:
+        return await db.merge(snapshot, load=False)
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if user:
+        user_cache.set_user(user)
+    return user
+
+
+async def authenticate(token: Optional[str], db: AsyncSession) -> User:
+    """Resolve a bearer token to an active user, or raise 401."""
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -22,7 +32,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    payload = decode_token(token)
+    payload = user_cache.decode_token(token)
     if not payload or payload.type != "access":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,8 +40,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    result = await db.execute(select(User).where(User.id == payload.sub))
-    user = result.scalar_one_or_none()
+    user = await load_user(db, payload.sub)
 
     if not user:
         raise HTTPException(
@@ -48,6 +57,25 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get the current authenticated user."""
+    return await authenticate(token, db)
+
+
+async def get_current_user_readonly(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_readonly_db)
+) -> User:
+    """
+    Same, for endpoints on get_readonly_db: the user is loaded in the
+    endpoint's own read-only session, so a request holds one connection.
+    """
+    return await authenticate(token, db)
+
+
 async def get_current_user_optional(
     token: Optional[str] = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -56,12 +84,11 @@ async def get_current_user_optional(
     if not token:
         return None
 
-    payload = decode_token(token)
+    payload = user_cache.decode_token(token)
     if not payload or payload.type != "access":
         return None
 
-    result = await db.execute(select(User).where(User.id == payload.sub))
-    user = result.scalar_one_or_none()
+    user = await load_user(db, payload.sub)
 
     if not user or not user.is_active:
         return None
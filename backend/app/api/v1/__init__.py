@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, users, products, cart, library, timetable, chat
+from app.api.v1 import auth, users, products, cart, library, timetable, chat, schools, internal
 
 router = APIRouter()
 
@@ -11,3 +11,5 @@ router.include_router(cart.router, prefix="/cart", tags=["Cart & Checkout"])
 router.include_router(library.router, prefix="/library", tags=["Library"])
 router.include_router(timetable.router, prefix="/timetables", tags=["Timetables"])
 router.include_router(chat.router, prefix="/chat", tags=["AI Tutor"])
+router.include_router(schools.router, prefix="/schools", tags=["Schools"])
+router.include_router(internal.router, prefix="/internal", tags=["Internal"])
@@ -2,20 +2,22 @@ from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, EmailStr
 from app.core.database import get_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     create_refresh_token,
     decode_token,
     generate_otp,
 )
 from app.core.config import settings
-from app.models import User, UserRole, OTPCode
+from app.core.hashing import password_hasher
+from app.core.rate_limit import auth_rate_limiter
+from app.core.user_cache import user_cache
+from app.models import User, UserRole
+from app.services.otp_store import otp_store
 
 router = APIRouter()
 
@@ -65,8 +67,10 @@ class PasswordResetConfirm(BaseModel):
 
 
 @router.post("/register", response_model=TokenResponse)
-async def register(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
+async def register(data: RegisterRequest, request: Request, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
+    await auth_rate_limiter.check(request, "register", data.email)
+
     # Check if email exists
     result = await db.execute(select(User).where(User.email == data.email))
     if result.scalar_one_or_none():
@@ -86,7 +90,7 @@ async def register(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
     # Create user
     user = User(
         email=data.email,
-        password_hash=get_password_hash(data.password),
+        password_hash=await password_hasher.hash(data.password),
         first_name=data.first_name,
         last_name=data.last_name,
         role=data.role,
@@ -116,13 +120,15 @@ async def register(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(data: LoginRequest, db: AsyncSession = Depends(get_db)):
+async def login(data: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
     """Login with email and password."""
+    await auth_rate_limiter.check(request, "login", data.email)
+
     # Find user
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(data.password, user.password_hash):
+    if not user or not await password_hasher.verify(data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -167,18 +173,9 @@ async def request_otp(data: OTPRequest, db: AsyncSession = Depends(get_db)):
         # Don't reveal if email exists
         return {"message": "If the email exists, an OTP has been sent"}
 
-    # Generate OTP
+    # Generate and save OTP
     code = generate_otp()
-    expires_at = datetime.utcnow() + timedelta(minutes=10)
-
-    # Save OTP
-    otp = OTPCode(
-        user_id=user.id,
-        code=code,
-        purpose=data.purpose,
-        expires_at=expires_at,
-    )
-    db.add(otp)
+    await otp_store.issue(db, user.id, data.purpose, code, settings.OTP_TTL_MINUTES * 60)
     await db.commit()
 
     # TODO: Send OTP via email/SMS
@@ -190,8 +187,10 @@ async def request_otp(data: OTPRequest, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/otp/verify")
-async def verify_otp(data: OTPVerify, db: AsyncSession = Depends(get_db)):
+async def verify_otp(data: OTPVerify, request: Request, db: AsyncSession = Depends(get_db)):
     """Verify an OTP code."""
+    await auth_rate_limiter.check(request, "otp_verify", data.email)
+
     # Find user
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalar_one_or_none()
@@ -202,27 +201,13 @@ async def verify_otp(data: OTPVerify, db: AsyncSession = Depends(get_db)):
             detail="Invalid OTP"
         )
 
-    # Find valid OTP
-    result = await db.execute(
-        select(OTPCode).where(
-            OTPCode.user_id == user.id,
-            OTPCode.code == data.code,
-            OTPCode.purpose == data.purpose,
-            OTPCode.used == False,
-            OTPCode.expires_at > datetime.utcnow(),
-        )
-    )
-    otp = result.scalar_one_or_none()
-
-    if not otp:
+    # Use the OTP (single use)
+    if not await otp_store.consume(db, user.id, data.purpose, data.code):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OTP"
         )
 
-    # Mark OTP as used
-    otp.used = True
-
     # Handle different purposes
     if data.purpose == "email_verify":
         user.email_verified = True
@@ -292,8 +277,10 @@ async def refresh_token(request: Request, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/password/reset")
-async def password_reset(data: PasswordResetConfirm, db: AsyncSession = Depends(get_db)):
+async def password_reset(data: PasswordResetConfirm, request: Request, db: AsyncSession = Depends(get_db)):
     """Reset password using OTP."""
+    await auth_rate_limiter.check(request, "password_reset", data.email)
+
     # Find user
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalar_one_or_none()
@@ -304,28 +291,17 @@ async def password_reset(data: PasswordResetConfirm, db: AsyncSession = Depends(
             detail="Invalid request"
         )
 
-    # Find valid OTP
-    result = await db.execute(
-        select(OTPCode).where(
-            OTPCode.user_id == user.id,
-            OTPCode.code == data.code,
-            OTPCode.purpose == "password_reset",
-            OTPCode.used == False,
-            OTPCode.expires_at > datetime.utcnow(),
-        )
-    )
-    otp = result.scalar_one_or_none()
-
-    if not otp:
+    # Use the OTP (single use)
+    if not await otp_store.consume(db, user.id, "password_reset", data.code):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired code"
         )
 
     # Update password
-    user.password_hash = get_password_hash(data.new_password)
-    otp.used = True
+    user.password_hash = await password_hasher.hash(data.new_password)
     await db.commit()
+    user_cache.invalidate(user.id)
 
     return {"message": "Password reset successfully"}
 
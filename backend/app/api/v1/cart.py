@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+import hmac
+import json
+from urllib.parse import urlencode
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import DateTime, Integer, bindparam, func, insert, literal, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.orm import defer, joinedload, noload
 from typing import Optional, List
+from uuid import UUID, uuid4
 from pydantic import BaseModel
 from datetime import datetime
 from app.core.database import get_db
@@ -10,14 +16,16 @@ from app.core.config import settings
 from app.api.deps import get_current_user
 from app.models import (
     User, Product, Bundle, Order, OrderItem, OrderStatus,
-    PaymentProvider, UserLibrary, PromoCode
+    PaymentProvider, UserLibrary, PromoCode, PaymentEvent, bundle_products
 )
+from app.models.order import generate_order_number
+from app.services.cart_store import CartFull, ItemAlreadyInCart, cart_store
+from app.services.catalog_cache import catalog_cache
+from app.services.payment_outbox import payment_outbox
 
 router = APIRouter()
 
 
-# In-memory cart (in production, use Redis or database)
-# For simplicity, we'll use session-based cart stored in DB
 class CartItem(BaseModel):
     product_id: Optional[str] = None
     bundle_id: Optional[str] = None
@@ -52,81 +60,176 @@ class CheckoutResponse(BaseModel):
     total_zar: int
 
 
-# Simple in-memory cart storage (replace with Redis in production)
-_carts: dict = {}
-
-
-def get_user_cart(user_id: str) -> dict:
-    """Get or create cart for user."""
-    if user_id not in _carts:
-        _carts[user_id] = {"items": [], "promo_code": None}
-    return _carts[user_id]
-
-
 @router.get("", response_model=CartResponse)
 async def get_cart(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get current user's cart."""
-    cart = get_user_cart(str(user.id))
-    items = []
-    subtotal = 0
+    """
+    Get current user's cart.
+
+    Served from the cart's price snapshot, unless the catalog changed
+    since it was priced. An applied promo code is always re-read (one
+    lookup by code): codes are deactivated and used up outside the app,
+    and the discount shown has to be the one checkout will give.
+    """
+    cart = await cart_store.get(user.id)
+    version = await catalog_cache.version_token()
+    stale = cart["version"] != version or any("line" not in item for item in cart["items"])
+    if stale and (cart["items"] or cart["promo_code"]):
+        cart = await reprice_cart(db, user.id, cart, version)
+    elif cart["promo_code"]:
+        promo = await load_promo(db, cart["promo_code"])
+        cart = {**cart, "promo": promo_terms(promo) if promo else None}
+
+    subtotal = cart["subtotal_zar"]
+    discount = promo_discount(cart["promo"], subtotal)
+    return CartResponse(
+        items=[item["line"] for item in cart["items"]],
+        subtotal_zar=subtotal,
+        discount_zar=discount,
+        total_zar=max(0, subtotal - discount),
+        promo_code=cart["promo_code"],
+    )
+
+
+def product_line(product: Product) -> dict:
+    """Cart line for a product (needs product.subject loaded)."""
+    return {
+        "type": "product",
+        "id": str(product.id),
+        "sku": product.sku,
+        "title": product.title,
+        "grade": product.grade,
+        "term": product.term,
+        "subject": product.subject.name,
+        "price_zar": product.current_price,
+        "thumbnail_url": product.thumbnail_url,
+    }
+
+
+def bundle_line(bundle: Bundle) -> dict:
+    return {
+        "type": "bundle",
+        "id": str(bundle.id),
+        "sku": bundle.sku,
+        "title": bundle.title,
+        "price_zar": bundle.price_zar,
+        "thumbnail_url": bundle.thumbnail_url,
+    }
+
+
+def promo_terms(promo: PromoCode) -> dict:
+    """
+    What the cart needs to recompute a discount without the database,
+    including whether the code can still be used.
+    """
+    return {
+        "code": promo.code,
+        "discount_percent": promo.discount_percent,
+        "discount_amount_zar": promo.discount_amount_zar,
+        "min_order_zar": promo.min_order_zar,
+        "is_active": promo.is_active,
+        "max_uses": promo.max_uses,
+        "current_uses": promo.current_uses or 0,
+        "valid_from": promo.valid_from.isoformat() if promo.valid_from else None,
+        "valid_until": promo.valid_until.isoformat() if promo.valid_until else None,
+    }
+
 
+def promo_discount(terms: Optional[dict], subtotal: int) -> int:
+    if not terms:
+        return 0
+    promo = PromoCode(**{
+        **terms,
+        "valid_from": datetime.fromisoformat(terms["valid_from"]) if terms["valid_from"] else None,
+        "valid_until": datetime.fromisoformat(terms["valid_until"]) if terms["valid_until"] else None,
+    })
+    return promo.calculate_discount(subtotal)
+
+
+async def reprice_cart(db: AsyncSession, user_id, cart: dict, version: str) -> dict:
+    """Price the cart from the database and store the result as its snapshot."""
+    priced = await price_cart(db, cart)
+    pricing = {
+        "items": [
+            {"product_id": str(line["product"].id), "line": product_line(line["product"])}
+            if line.get("product") else
+            {"bundle_id": str(line["bundle"].id), "line": bundle_line(line["bundle"])}
+            for line in priced["lines"]
+        ],
+        "subtotal_zar": priced["subtotal_zar"],
+        "promo": promo_terms(priced["promo"]) if priced["promo"] else None,
+        "version": version,
+    }
+    # Skipped if the cart changed meanwhile; the next read prices it again
+    await cart_store.save_pricing(user_id, cart["rev"], pricing)
+    return {**cart, **pricing}
+
+
+async def load_promo(db: AsyncSession, code: str) -> Optional[PromoCode]:
+    """The promo code, if it exists and can still be used."""
+    result = await db.execute(select(PromoCode).where(PromoCode.code == code))
+    promo = result.scalar_one_or_none()
+    return promo if promo and promo.is_valid else None
+
+
+async def price_cart(db: AsyncSession, cart: dict) -> dict:
+    """
+    Load everything in the cart and price it in memory.
+
+    At most three statements whatever the cart size: products with their
+    subjects, bundles with their product ids, and the promo code. Items
+    that no longer exist are dropped; order follows the cart.
+    """
+    product_ids = [UUID(item["product_id"]) for item in cart["items"] if item.get("product_id")]
+    bundle_ids = [UUID(item["bundle_id"]) for item in cart["items"] if item.get("bundle_id")]
+
+    products = {}
+    if product_ids:
+        result = await db.execute(
+            select(Product)
+            .options(defer(Product.content_json, raiseload=True), joinedload(Product.subject))
+            .where(Product.id.in_(product_ids))
+        )
+        products = {p.id: p for p in result.scalars()}
+
+    bundles = {}
+    if bundle_ids:
+        result = await db.execute(
+            select(Bundle, func.array_remove(func.array_agg(bundle_products.c.product_id), None))
+            .outerjoin(bundle_products, bundle_products.c.bundle_id == Bundle.id)
+            .where(Bundle.id.in_(bundle_ids))
+            .group_by(Bundle.id)
+        )
+        bundles = {bundle.id: (bundle, ids) for bundle, ids in result.all()}
+
+    lines = []
     for item in cart["items"]:
         if item.get("product_id"):
-            result = await db.execute(
-                select(Product).options(selectinload(Product.subject))
-                .where(Product.id == item["product_id"])
-            )
-            product = result.scalar_one_or_none()
+            product = products.get(UUID(item["product_id"]))
             if product:
-                price = product.current_price
-                subtotal += price
-                items.append({
-                    "type": "product",
-                    "id": str(product.id),
-                    "sku": product.sku,
-                    "title": product.title,
-                    "grade": product.grade,
-                    "term": product.term,
-                    "subject": product.subject.name,
-                    "price_zar": price,
-                    "thumbnail_url": product.thumbnail_url,
-                })
+                lines.append({"product": product, "price_zar": product.current_price})
         elif item.get("bundle_id"):
-            result = await db.execute(
-                select(Bundle).where(Bundle.id == item["bundle_id"])
-            )
-            bundle = result.scalar_one_or_none()
+            bundle, ids = bundles.get(UUID(item["bundle_id"]), (None, None))
             if bundle:
-                subtotal += bundle.price_zar
-                items.append({
-                    "type": "bundle",
-                    "id": str(bundle.id),
-                    "sku": bundle.sku,
-                    "title": bundle.title,
-                    "price_zar": bundle.price_zar,
-                    "thumbnail_url": bundle.thumbnail_url,
-                })
-
-    # Calculate discount
+                lines.append({"bundle": bundle, "product_ids": ids, "price_zar": bundle.price_zar})
+    subtotal = sum(line["price_zar"] for line in lines)
+
     discount = 0
+    promo = None
     if cart.get("promo_code"):
-        result = await db.execute(
-            select(PromoCode).where(PromoCode.code == cart["promo_code"])
-        )
-        promo = result.scalar_one_or_none()
-        if promo and promo.is_valid:
+        promo = await load_promo(db, cart["promo_code"])
+        if promo:
             discount = promo.calculate_discount(subtotal)
 
-    return CartResponse(
-        items=items,
-        subtotal_zar=subtotal,
-        discount_zar=discount,
-        total_zar=max(0, subtotal - discount),
-        promo_code=cart.get("promo_code"),
-    )
+    return {
+        "lines": lines,
+        "subtotal_zar": subtotal,
+        "discount_zar": discount,
+        "total_zar": max(0, subtotal - discount),
+        "promo": promo,
+    }
 
 
 @router.post("/items")
@@ -136,12 +239,15 @@ async def add_to_cart(
     db: AsyncSession = Depends(get_db),
 ):
     """Add item to cart."""
-    cart = get_user_cart(str(user.id))
+    # Taken before reading prices, so a concurrent catalog change marks them stale
+    version = await catalog_cache.version_token()
 
     # Validate product/bundle exists
     if data.product_id:
         result = await db.execute(
-            select(Product).where(Product.id == data.product_id, Product.is_published == True)
+            select(Product)
+            .options(defer(Product.content_json, raiseload=True), joinedload(Product.subject))
+            .where(Product.id == data.product_id, Product.is_published == True)
         )
         product = result.scalar_one_or_none()
         if not product:
@@ -157,12 +263,14 @@ async def add_to_cart(
         if library_check.scalar_one_or_none():
             raise HTTPException(status_code=400, detail="You already own this product")
 
-        # Check if already in cart
-        for item in cart["items"]:
-            if item.get("product_id") == data.product_id:
-                raise HTTPException(status_code=400, detail="Product already in cart")
-
-        cart["items"].append({"product_id": data.product_id})
+        try:
+            cart_count = await cart_store.add_item(
+                user.id, "product_id", str(product.id), product_line(product), version
+            )
+        except ItemAlreadyInCart:
+            raise HTTPException(status_code=400, detail="Product already in cart")
+        except CartFull:
+            raise HTTPException(status_code=400, detail=f"A cart holds at most {settings.CART_MAX_ITEMS} items")
 
     elif data.bundle_id:
         result = await db.execute(
@@ -172,16 +280,18 @@ async def add_to_cart(
         if not bundle:
             raise HTTPException(status_code=404, detail="Bundle not found")
 
-        # Check if already in cart
-        for item in cart["items"]:
-            if item.get("bundle_id") == data.bundle_id:
-                raise HTTPException(status_code=400, detail="Bundle already in cart")
-
-        cart["items"].append({"bundle_id": data.bundle_id})
+        try:
+            cart_count = await cart_store.add_item(
+                user.id, "bundle_id", str(bundle.id), bundle_line(bundle), version
+            )
+        except ItemAlreadyInCart:
+            raise HTTPException(status_code=400, detail="Bundle already in cart")
+        except CartFull:
+            raise HTTPException(status_code=400, detail=f"A cart holds at most {settings.CART_MAX_ITEMS} items")
     else:
         raise HTTPException(status_code=400, detail="Product or bundle ID required")
 
-    return {"message": "Item added to cart", "cart_count": len(cart["items"])}
+    return {"message": "Item added to cart", "cart_count": cart_count}
 
 
 @router.delete("/items/{item_id}")
@@ -190,18 +300,12 @@ async def remove_from_cart(
     user: User = Depends(get_current_user),
 ):
     """Remove item from cart."""
-    cart = get_user_cart(str(user.id))
+    cart_count = await cart_store.remove_item(user.id, item_id)
 
-    original_count = len(cart["items"])
-    cart["items"] = [
-        item for item in cart["items"]
-        if item.get("product_id") != item_id and item.get("bundle_id") != item_id
-    ]
-
-    if len(cart["items"]) == original_count:
+    if cart_count is None:
         raise HTTPException(status_code=404, detail="Item not found in cart")
 
-    return {"message": "Item removed", "cart_count": len(cart["items"])}
+    return {"message": "Item removed", "cart_count": cart_count}
 
 
 @router.post("/promo")
@@ -211,6 +315,7 @@ async def apply_promo_code(
     db: AsyncSession = Depends(get_db),
 ):
     """Apply a promo code to cart."""
+    version = await catalog_cache.version_token()
     result = await db.execute(
         select(PromoCode).where(PromoCode.code == data.code.upper())
     )
@@ -219,8 +324,7 @@ async def apply_promo_code(
     if not promo or not promo.is_valid:
         raise HTTPException(status_code=400, detail="Invalid or expired promo code")
 
-    cart = get_user_cart(str(user.id))
-    cart["promo_code"] = promo.code
+    await cart_store.set_promo(user.id, promo.code, promo_terms(promo), version)
 
     return {"message": "Promo code applied", "code": promo.code}
 
@@ -228,117 +332,205 @@ async def apply_promo_code(
 @router.delete("/promo")
 async def remove_promo_code(user: User = Depends(get_current_user)):
     """Remove promo code from cart."""
-    cart = get_user_cart(str(user.id))
-    cart["promo_code"] = None
+    await cart_store.set_promo(user.id, None, None, await catalog_cache.version_token())
     return {"message": "Promo code removed"}
 
 
+# Providers checkout can send a customer to
+CHECKOUT_PROVIDERS = {PaymentProvider.PAYFAST, PaymentProvider.YOCO}
+
+
+def checkout_request_hash(provider: PaymentProvider, cart: dict) -> str:
+    """Fingerprint of what a checkout was asked to buy, stored with its Idempotency-Key."""
+    request = {
+        "payment_provider": provider.value,
+        "items": sorted(
+            f"product:{item['product_id']}" if item.get("product_id") else f"bundle:{item['bundle_id']}"
+            for item in cart["items"]
+        ),
+        "promo_code": cart["promo_code"],
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+def replay_checkout(
+    existing: Order, user: User, request_hash: str, provider: PaymentProvider, cart: dict, response: Response
+) -> CheckoutResponse:
+    """
+    The original response for a reused Idempotency-Key, or 422 if the key
+    now comes with a different cart or provider. An empty cart is a plain
+    retry: the original checkout cleared it.
+    """
+    same_request = existing.idempotency_request_hash == request_hash or (
+        not cart["items"] and existing.payment_provider == provider
+    )
+    if not same_request:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different checkout",
+        )
+    response.headers["Idempotent-Replayed"] = "true"
+    return checkout_response(existing, user)
+
+
+def checkout_response(order: Order, user: User) -> CheckoutResponse:
+    """The checkout result for an order; also used to replay a retried checkout."""
+    if order.payment_provider == PaymentProvider.PAYFAST:
+        payment_url = generate_payfast_url(order, user)
+    else:
+        payment_url = f"{settings.FRONTEND_URL}/checkout/yoco?order={order.order_number}"
+    return CheckoutResponse(
+        order_id=str(order.id),
+        order_number=order.order_number,
+        payment_url=payment_url,
+        total_zar=order.total_zar,
+    )
+
+
+async def find_checkout(db: AsyncSession, user_id, idempotency_key: str) -> Optional[Order]:
+    result = await db.execute(
+        select(Order)
+        .options(noload(Order.items))
+        .where(Order.user_id == user_id, Order.idempotency_key == idempotency_key)
+    )
+    return result.scalar_one_or_none()
+
+
+def create_order_statement(order: dict, items: List[dict]):
+    """
+    One INSERT ... RETURNING for the order and all its items: the order
+    row in a CTE, the items as unnested arrays selected against it.
+
+    With an idempotency key, a concurrent checkout that already claimed
+    it makes the order insert a no-op (it waits for that transaction), so
+    no items are written and no row comes back.
+    """
+    orders = Order.__table__
+    order_items = OrderItem.__table__
+
+    new_order = (
+        pg_insert(orders)
+        .values(**order)
+        .on_conflict_do_nothing(index_elements=[orders.c.user_id, orders.c.idempotency_key])
+        .returning(orders.c.id, orders.c.order_number)
+        .cte("new_order")
+    )
+
+    def array(values: list, item_type):
+        return bindparam(None, values, type_=ARRAY(item_type))
+
+    rows = func.unnest(
+        array([item["id"] for item in items], PG_UUID(as_uuid=True)),
+        array([item["product_id"] for item in items], PG_UUID(as_uuid=True)),
+        array([item["bundle_id"] for item in items], PG_UUID(as_uuid=True)),
+        array([item["price_zar"] for item in items], Integer),
+    ).table_valued("id", "product_id", "bundle_id", "price_zar").render_derived(name="item")
+
+    new_items = (
+        insert(order_items)
+        .from_select(
+            ["id", "order_id", "product_id", "bundle_id", "price_zar", "quantity", "created_at"],
+            select(
+                rows.c.id, new_order.c.id, rows.c.product_id, rows.c.bundle_id, rows.c.price_zar,
+                literal(1), literal(order["created_at"], DateTime),
+            ).select_from(new_order).join(rows, true()),
+            include_defaults=False,
+        )
+        .cte("new_items")
+    )
+
+    return select(new_order.c.id, new_order.c.order_number).add_cte(new_items)
+
+
 @router.post("/checkout", response_model=CheckoutResponse)
 async def checkout(
     data: CheckoutRequest,
+    response: Response,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
 ):
-    """Create order and get payment URL."""
-    cart = get_user_cart(str(user.id))
-
-    if not cart["items"]:
-        raise HTTPException(status_code=400, detail="Cart is empty")
+    """
+    Create order and get payment URL.
+
+    Send an Idempotency-Key header to make retries safe: a checkout
+    repeated with the same key returns the original order's response and
+    writes nothing. Reusing a key for a different cart is a 422.
+    """
+    try:
+        provider = PaymentProvider(data.payment_provider)
+    except ValueError:
+        provider = None
+    if provider not in CHECKOUT_PROVIDERS:
+        raise HTTPException(status_code=400, detail="Invalid payment provider")
 
-    # Calculate totals
-    subtotal = 0
-    order_items = []
+    cart = await cart_store.get(user.id)
+    request_hash = checkout_request_hash(provider, cart)
 
-    for item in cart["items"]:
-        if item.get("product_id"):
-            result = await db.execute(
-                select(Product).where(Product.id == item["product_id"])
-            )
-            product = result.scalar_one_or_none()
-            if product:
-                price = product.current_price
-                subtotal += price
-                order_items.append({
-                    "product_id": product.id,
-                    "price_zar": price,
-                })
-        elif item.get("bundle_id"):
-            result = await db.execute(
-                select(Bundle).options(selectinload(Bundle.products))
-                .where(Bundle.id == item["bundle_id"])
-            )
-            bundle = result.scalar_one_or_none()
-            if bundle:
-                subtotal += bundle.price_zar
-                order_items.append({
-                    "bundle_id": bundle.id,
-                    "price_zar": bundle.price_zar,
-                    "products": [p.id for p in bundle.products],
-                })
-
-    # Apply promo discount
-    discount = 0
-    promo_code_id = None
-    if cart.get("promo_code"):
-        result = await db.execute(
-            select(PromoCode).where(PromoCode.code == cart["promo_code"])
-        )
-        promo = result.scalar_one_or_none()
-        if promo and promo.is_valid:
-            discount = promo.calculate_discount(subtotal)
-            promo_code_id = promo.id
+    if idempotency_key:
+        existing = await find_checkout(db, user.id, idempotency_key)
+        if existing:
+            return replay_checkout(existing, user, request_hash, provider, cart, response)
 
-    total = max(0, subtotal - discount)
+    if not cart["items"]:
+        raise HTTPException(status_code=400, detail="Cart is empty")
 
-    # Create order
+    priced = await price_cart(db, cart)
+    now = datetime.utcnow()
     order = Order(
+        id=uuid4(),
         user_id=user.id,
-        subtotal_zar=subtotal,
-        discount_zar=discount,
-        total_zar=total,
-        promo_code_id=promo_code_id,
-        payment_provider=PaymentProvider(data.payment_provider),
+        order_number=generate_order_number(),
+        status=OrderStatus.PENDING,
+        subtotal_zar=priced["subtotal_zar"],
+        discount_zar=priced["discount_zar"],
+        total_zar=priced["total_zar"],
+        promo_code_id=priced["promo"].id if priced["promo"] else None,
+        payment_provider=provider,
+        idempotency_key=idempotency_key,
+        idempotency_request_hash=request_hash if idempotency_key else None,
+        created_at=now,
+        updated_at=now,
     )
-    db.add(order)
-    await db.flush()  # Get order ID
-
-    # Create order items
-    for item in order_items:
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=item.get("product_id"),
-            bundle_id=item.get("bundle_id"),
-            price_zar=item["price_zar"],
-        )
-        db.add(order_item)
+    order_items = [
+        {
+            "id": uuid4(),
+            "product_id": line["product"].id if line.get("product") else None,
+            "bundle_id": line["bundle"].id if line.get("bundle") else None,
+            "price_zar": line["price_zar"],
+        }
+        for line in priced["lines"]
+    ]
 
+    # Create order and items in one statement
+    columns = [
+        "id", "user_id", "order_number", "status", "subtotal_zar", "discount_zar", "total_zar",
+        "promo_code_id", "payment_provider", "idempotency_key", "idempotency_request_hash",
+        "created_at", "updated_at",
+    ]
+    result = await db.execute(
+        create_order_statement({name: getattr(order, name) for name in columns}, order_items)
+    )
+    created = result.first()
     await db.commit()
-    await db.refresh(order)
 
-    # Generate payment URL
-    if data.payment_provider == "payfast":
-        payment_url = generate_payfast_url(order, user)
-    elif data.payment_provider == "yoco":
-        payment_url = f"{settings.FRONTEND_URL}/checkout/yoco?order={order.order_number}"
-    else:
-        raise HTTPException(status_code=400, detail="Invalid payment provider")
+    if created is None:
+        # Lost a race with a retry carrying the same key; that one won
+        existing = await find_checkout(db, user.id, idempotency_key)
+        return replay_checkout(existing, user, request_hash, provider, cart, response)
 
-    # Clear cart
-    _carts[str(user.id)] = {"items": [], "promo_code": None}
+    # Carts live outside the database, so this follows the commit. Only
+    # the cart that was priced is cleared; if it changed meanwhile, just
+    # the ordered items are taken out.
+    if not await cart_store.clear(user.id, rev=cart["rev"]):
+        for item in cart["items"]:
+            await cart_store.remove_item(user.id, item.get("product_id") or item.get("bundle_id"))
 
-    return CheckoutResponse(
-        order_id=str(order.id),
-        order_number=order.order_number,
-        payment_url=payment_url,
-        total_zar=total,
-    )
+    return checkout_response(order, user)
 
 
 def generate_payfast_url(order: Order, user: User) -> str:
     """Generate PayFast payment URL."""
-    import hashlib
-    from urllib.parse import urlencode
-
     # PayFast parameters
     data = {
         "merchant_id": settings.PAYFAST_MERCHANT_ID or "10000100",
@@ -367,86 +559,57 @@ def generate_payfast_url(order: Order, user: User) -> str:
     return f"{base_url}?{urlencode(data)}"
 
 
+# Notification fields stored in payment_events columns, with their lengths
+PAYFAST_FIELD_LENGTHS = {
+    "m_payment_id": PaymentEvent.__table__.c.order_number.type.length,
+    "pf_payment_id": PaymentEvent.__table__.c.provider_payment_id.type.length,
+    "payment_status": PaymentEvent.__table__.c.payment_status.type.length,
+}
+
+
+def payfast_signature_valid(data: dict) -> bool:
+    """
+    Check a PayFast notification's signature: the md5 of every field but
+    the signature, blanks included and values as posted, URL-encoded in
+    the order received, plus the passphrase.
+    """
+    fields = [
+        (key, "" if value is None else str(value))
+        for key, value in data.items() if key != "signature"
+    ]
+    signature_string = urlencode(fields)
+    if settings.PAYFAST_PASSPHRASE:
+        signature_string += "&" + urlencode({"passphrase": settings.PAYFAST_PASSPHRASE})
+    expected = hashlib.md5(signature_string.encode()).hexdigest()
+    return hmac.compare_digest(expected, str(data.get("signature") or ""))
+
+
 @router.post("/webhook/payfast")
 async def payfast_webhook(
     request_data: dict,
     db: AsyncSession = Depends(get_db),
 ):
-    """Handle PayFast payment notification."""
-    # Verify signature (implement proper verification in production)
+    """
+    Handle PayFast payment notification.
+
+    The notification is only checked and stored here; payment_outbox
+    workers update the order and fulfill it, so PayFast gets its 200
+    straight away.
+    """
     payment_id = request_data.get("m_payment_id")
-    payment_status = request_data.get("payment_status")
 
     if not payment_id:
         raise HTTPException(status_code=400, detail="Invalid webhook data")
 
-    # Find order
-    result = await db.execute(
-        select(Order).where(Order.order_number == payment_id)
-    )
-    order = result.scalar_one_or_none()
-
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-
-    if payment_status == "COMPLETE":
-        order.status = OrderStatus.PAID
-        order.paid_at = datetime.utcnow()
-        order.payment_reference = request_data.get("pf_payment_id")
-
-        # Add products to user's library
-        await fulfill_order(order, db)
+    for field, max_length in PAYFAST_FIELD_LENGTHS.items():
+        if len(str(request_data.get(field) or "")) > max_length:
+            raise HTTPException(status_code=400, detail=f"Invalid webhook data: {field} too long")
 
-    elif payment_status == "CANCELLED":
-        order.status = OrderStatus.CANCELLED
+    if not payfast_signature_valid(request_data):
+        raise HTTPException(status_code=400, detail="Invalid signature")
 
-    await db.commit()
+    if await payment_outbox.record(db, "payfast", request_data):
+        await db.commit()
+        payment_outbox.notify()
 
     return {"status": "ok"}
-
-
-async def fulfill_order(order: Order, db: AsyncSession):
-    """Add purchased products to user's library."""
-    # Get order items
-    result = await db.execute(
-        select(OrderItem).options(
-            selectinload(OrderItem.bundle).selectinload(Bundle.products)
-        ).where(OrderItem.order_id == order.id)
-    )
-    items = result.scalars().all()
-
-    products_to_add = []
-
-    for item in items:
-        if item.product_id:
-            products_to_add.append(item.product_id)
-        elif item.bundle_id and item.bundle:
-            for product in item.bundle.products:
-                products_to_add.append(product.id)
-
-    # Add to library (avoid duplicates)
-    for product_id in set(products_to_add):
-        existing = await db.execute(
-            select(UserLibrary).where(
-                UserLibrary.user_id == order.user_id,
-                UserLibrary.product_id == product_id,
-            )
-        )
-        if not existing.scalar_one_or_none():
-            library_entry = UserLibrary(
-                user_id=order.user_id,
-                product_id=product_id,
-                order_id=order.id,
-            )
-            db.add(library_entry)
-
-    # Update promo code usage
-    if order.promo_code_id:
-        result = await db.execute(
-            select(PromoCode).where(PromoCode.id == order.promo_code_id)
-        )
-        promo = result.scalar_one_or_none()
-        if promo:
-            promo.current_uses += 1
-
-    await db.commit()
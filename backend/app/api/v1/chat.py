@@ -2,12 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import defer, selectinload
 from typing import Optional, List
 from pydantic import BaseModel
 from datetime import datetime
-from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.core.database import get_db, get_readonly_db
+from app.api.deps import get_current_user, get_current_user_readonly
 from app.models import (
     User, Product, UserLibrary, TutorSubscription, TutorPlan,
     ChatSession, ChatMessage
@@ -96,8 +96,8 @@ async def get_tutor_plans():
 
 @router.get("/usage", response_model=TutorUsageResponse)
 async def get_tutor_usage(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db),
 ):
     """Get current user's AI tutor usage."""
     result = await db.execute(
@@ -155,7 +155,9 @@ async def start_chat_session(
         # Verify user owns the product
         result = await db.execute(
             select(UserLibrary)
-            .options(selectinload(UserLibrary.product).selectinload(Product.subject))
+            .options(selectinload(UserLibrary.product).options(
+                defer(Product.content_json, raiseload=True), selectinload(Product.subject)
+            ))
             .where(
                 UserLibrary.user_id == user.id,
                 UserLibrary.product_id == data.product_id,
@@ -192,8 +194,8 @@ async def start_chat_session(
 
 @router.get("/sessions", response_model=List[SessionResponse])
 async def list_sessions(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db),
 ):
     """List user's recent chat sessions."""
     result = await db.execute(
@@ -221,8 +223,8 @@ async def list_sessions(
 @router.get("/sessions/{session_id}/messages", response_model=List[MessageResponse])
 async def get_session_messages(
     session_id: str,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db),
 ):
     """Get all messages in a chat session."""
     result = await db.execute(
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends
+from app.api.deps import require_admin
+from app.core.compression import response_compressor
+from app.core.database import (
+    engine, pool_metrics, replica_engine, replica_pool_metrics, replica_monitor
+)
+from app.core.hashing import password_hasher
+from app.core.rate_limit import auth_rate_limiter
+from app.core.slow_queries import slow_query_log
+from app.core.user_cache import user_cache
+from app.services.cart_store import cart_store
+from app.services.catalog_cache import catalog_cache
+from app.services.catalog_json import product_json
+from app.services.payment_outbox import payment_outbox
+from app.models import User
+
+router = APIRouter()
+
+
+@router.get("/metrics/hashing")
+async def get_hashing_metrics(admin: User = Depends(require_admin)):
+    """Password hashing pool usage and latency."""
+    return password_hasher.stats()
+
+
+@router.get("/metrics/auth-cache")
+async def get_auth_cache_metrics(admin: User = Depends(require_admin)):
+    """Hit/miss counters for the authenticated-user and token caches."""
+    return user_cache.stats()
+
+
+@router.get("/metrics/rate-limits")
+async def get_rate_limit_metrics(admin: User = Depends(require_admin)):
+    """Allowed/rejected counters for auth endpoint rate limits."""
+    return auth_rate_limiter.stats()
+
+
+@router.get("/metrics/catalog-cache")
+async def get_catalog_cache_metrics(admin: User = Depends(require_admin)):
+    """Hit ratio, single-flight and invalidation counters for the catalog cache."""
+    return {**catalog_cache.stats(), "product_json": product_json.stats()}
+
+
+@router.get("/metrics/cart-store")
+async def get_cart_store_metrics(admin: User = Depends(require_admin)):
+    """Cart count and memory use, plus evictions/expirations for the cart store."""
+    return await cart_store.stats()
+
+
+@router.get("/metrics/payment-outbox")
+async def get_payment_outbox_metrics(admin: User = Depends(require_admin)):
+    """Payment webhook queue depth and age, retries/failures and processing lag."""
+    return await payment_outbox.stats()
+
+
+@router.get("/metrics/compression")
+async def get_compression_metrics(admin: User = Depends(require_admin)):
+    """Compression ratio, CPU time and compressed-body cache hits per route."""
+    return response_compressor.stats()
+
+
+@router.get("/metrics/db-pool")
+async def get_db_pool_metrics(admin: User = Depends(require_admin)):
+    """Connection pool usage, acquire wait times and checkout time per route."""
+    metrics = {"primary": pool_metrics.snapshot(engine.sync_engine.pool)}
+    if replica_engine is not None:
+        metrics["replica"] = replica_pool_metrics.snapshot(replica_engine.sync_engine.pool)
+    metrics["replica_health"] = replica_monitor.stats()
+    return metrics
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(admin: User = Depends(require_admin)):
+    """Recent slow statements and any EXPLAIN (ANALYZE, BUFFERS) plans captured for them."""
+    return slow_query_log.stats()
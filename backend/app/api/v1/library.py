@@ -1,18 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update
+from sqlalchemy.orm import defer, selectinload
 from typing import Optional, List
 from pydantic import BaseModel
 from datetime import datetime
-from app.core.database import get_db
+from app.core.database import get_db, get_readonly_db
 from app.core.config import settings
-from app.api.deps import get_current_user
-from app.models import User, Product, UserLibrary
+from app.core.http_cache import is_not_modified, make_etag, not_modified, set_validators
+from app.api.deps import get_current_user, get_current_user_readonly
+from app.models import User, Product, Subject, UserLibrary
 from app.services.delivery_service import DeliveryService
 
 router = APIRouter()
 
+# Personal content: browsers may keep it but must revalidate every time
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
 
 class LibraryItemResponse(BaseModel):
     id: str
@@ -42,13 +46,15 @@ class DownloadResponse(BaseModel):
 
 @router.get("", response_model=List[LibraryItemResponse])
 async def get_library(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db),
 ):
     """Get user's purchased study guides."""
     result = await db.execute(
         select(UserLibrary)
-        .options(selectinload(UserLibrary.product).selectinload(Product.subject))
+        .options(selectinload(UserLibrary.product).options(
+            defer(Product.content_json, raiseload=True), selectinload(Product.subject)
+        ))
         .where(UserLibrary.user_id == user.id)
         .order_by(UserLibrary.purchased_at.desc())
     )
@@ -76,29 +82,54 @@ async def get_library(
 @router.get("/{product_id}", response_model=LibraryDetailResponse)
 async def get_library_item(
     product_id: str,
+    request: Request,
+    response: Response,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a specific purchased study guide with content."""
+    """
+    Get a specific purchased study guide with content.
+
+    Supports If-None-Match: recording the access and reading the
+    validator is a single UPDATE ... RETURNING, so a 304 never loads
+    content_json.
+    """
+    # last_accessed_at changes on every visit but the guide doesn't, so the
+    # ETag is weak and leaves it out
     result = await db.execute(
-        select(UserLibrary)
-        .options(selectinload(UserLibrary.product).selectinload(Product.subject))
+        update(UserLibrary)
         .where(
             UserLibrary.user_id == user.id,
             UserLibrary.product_id == product_id,
+            Product.id == UserLibrary.product_id,
+            Subject.id == Product.subject_id,
         )
+        .values(last_accessed_at=datetime.utcnow())
+        .returning(
+            UserLibrary.id, UserLibrary.download_count, UserLibrary.progress_percent,
+            Product.updated_at, Subject.name,
+        )
+        .execution_options(synchronize_session=False)
     )
-    item = result.scalar_one_or_none()
+    validator = result.first()
 
-    if not item:
+    if not validator:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found in your library"
         )
 
-    # Update last accessed
-    item.last_accessed_at = datetime.utcnow()
-    await db.commit()
+    etag = make_etag(*validator, weak=True)
+    if is_not_modified(request, etag):
+        return not_modified(etag, cache_control=PRIVATE_CACHE_CONTROL)
+
+    result = await db.execute(
+        select(UserLibrary)
+        .options(selectinload(UserLibrary.product).selectinload(Product.subject))
+        .where(UserLibrary.id == validator.id)
+    )
+    item = result.scalar_one()
+    set_validators(response, etag, cache_control=PRIVATE_CACHE_CONTROL)
 
     return LibraryDetailResponse(
         id=str(item.id),
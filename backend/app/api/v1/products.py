@@ -1,15 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import base64
+import json
+from collections import defaultdict
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import String, select, and_, or_, case, func, text, tuple_
+from sqlalchemy.orm import defer, selectinload
+from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional, List
 from pydantic import BaseModel
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.http_cache import is_not_modified, make_etag, not_modified, set_validators
 from app.api.deps import get_current_user_optional
 from app.models import Product, Subject, Bundle, User
+from app.services.catalog_cache import catalog_cache
+from app.services.catalog_json import (
+    bundle_json, bundle_list_json, json_object, product_detail_json, product_json, subject_list_json,
+)
 
 router = APIRouter()
 
+# Catalog cards never show the course breakdown; raise if something tries
+LIST_OPTIONS = defer(Product.content_json, raiseload=True)
+
+CATALOG_CACHE_CONTROL = f"public, max-age={settings.CATALOG_HTTP_MAX_AGE_SECONDS}"
+
+
+def public_cache_headers(response: Response):
+    """Let browsers and CDNs reuse public catalog responses briefly."""
+    response.headers["Cache-Control"] = CATALOG_CACHE_CONTROL
+
+
+def catalog_json_response(content: bytes) -> Response:
+    """
+    Send pre-serialized catalog JSON as is. The route's response_model
+    still documents the shape; FastAPI skips validating a Response.
+    """
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"Cache-Control": CATALOG_CACHE_CONTROL},
+    )
+
 
 # Pydantic Schemas
 class SubjectResponse(BaseModel):
@@ -72,31 +105,135 @@ class BundleResponse(BaseModel):
         from_attributes = True
 
 
+class TopicOutline(BaseModel):
+    title: Optional[str]
+    hours: Optional[float]
+
+
+class UnitOutline(BaseModel):
+    title: Optional[str]
+    hours: float
+    topics: List[TopicOutline]
+
+
+class ProductOutlineResponse(BaseModel):
+    sku: str
+    title: str
+    total_hours: float
+    units: List[UnitOutline]
+
+
 class ProductListResponse(BaseModel):
     products: List[ProductResponse]
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    value: str
+    label: str
+    count: int
+
+
+class ProductFacetsResponse(BaseModel):
+    total: int
+    grade: List[FacetCount]
+    term: List[FacetCount]
+    subject: List[FacetCount]
+    year: List[FacetCount]
 
 
 @router.get("/subjects", response_model=List[SubjectResponse])
-async def list_subjects(db: AsyncSession = Depends(get_db)):
+async def list_subjects(db: AsyncSession = Depends(get_read_db)):
     """List all subjects."""
+    return catalog_json_response(
+        await catalog_cache.get_or_load(("subjects",), lambda: load_subjects(db))
+    )
+
+
+async def load_subjects(db: AsyncSession) -> bytes:
     result = await db.execute(
         select(Subject).where(Subject.is_active == True).order_by(Subject.name)
     )
-    subjects = result.scalars().all()
-    return [
-        SubjectResponse(
-            id=str(s.id),
-            name=s.name,
-            code=s.code,
-            description=s.description,
-            icon_url=s.icon_url,
-            color=s.color,
+    return subject_list_json(result.scalars().all())
+
+
+def product_filters(
+    grade: Optional[int] = None,
+    subject: Optional[str] = None,
+    term: Optional[int] = None,
+    year: Optional[int] = None,
+    featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    search_mode: str = "ilike",
+) -> list:
+    """WHERE clauses for a catalog listing, shared by the page and count queries."""
+    filters = [Product.is_published == True]
+    if grade:
+        filters.append(Product.grade == grade)
+    if term:
+        filters.append(Product.term == term)
+    if year:
+        filters.append(Product.year == year)
+    if featured is not None:
+        filters.append(Product.is_featured == featured)
+    if subject:
+        filters.append(subject_filter(subject))
+    if search and search_mode == "fts":
+        filters.append(Product.search_vector.op("@@")(search_query(search)))
+    elif search and search_mode == "trigram":
+        filters.append(Product.title.op("%")(search))
+    elif search and search_mode == "ilike":
+        filters.append(
+            or_(
+                Product.title.ilike(f"%{search}%"),
+                Product.description.ilike(f"%{search}%"),
+            )
+        )
+    elif search:
+        raise ValueError(f"Unknown search mode: {search_mode!r}")
+    return filters
+
+
+def subject_filter(subject: str):
+    return Product.subject_id.in_(
+        select(Subject.id).where(
+            or_(Subject.code == subject.upper(), Subject.name.ilike(f"%{subject}%"))
+        )
+    )
+
+
+def search_query(search: str):
+    return func.websearch_to_tsquery("english", search)
+
+
+def search_rank(search: str, search_mode: str):
+    """Relevance expression for ranked search modes (None for ilike)."""
+    if search_mode == "fts":
+        return func.ts_rank(Product.search_vector, search_query(search))
+    if search_mode == "trigram":
+        return func.similarity(Product.title, search)
+    return None
+
+
+def encode_cursor(product: Product) -> str:
+    """Opaque keyset cursor for the (grade, term, id) listing order."""
+    raw = json.dumps([product.grade, product.term, str(product.id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        grade, term, product_id = json.loads(raw)
+        return int(grade), int(term), UUID(product_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
-        for s in subjects
-    ]
 
 
 @router.get("", response_model=ProductListResponse)
@@ -109,94 +246,239 @@ async def list_products(
     search: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List published study guides with filters."""
-    query = select(Product).options(selectinload(Product.subject)).where(
-        Product.is_published == True
+    """
+    List published study guides with filters.
+
+    Results are ordered by grade, term and id. Pass the returned
+    next_cursor to fetch the following page without OFFSET.
+
+    Searches are ranked by relevance instead and paginate by page only.
+    When no product matches the search words, titles similar to the
+    query are returned (typo tolerance).
+    """
+    load = lambda: load_product_page(
+        db, grade, subject, term, year, featured, search, page, page_size, cursor
     )
+    if not cacheable_listing(search, cursor, page) or not await known_filter_values(db, subject, year):
+        return catalog_json_response(await load())
+    key = ("products", grade, subject and subject.upper(), term, year, featured, page, page_size)
+    return catalog_json_response(await catalog_cache.get_or_load(key, load))
+
+
+# Pages past this are rare; caching them would only evict the hot ones
+CACHED_LISTING_PAGES = 5
+
+
+def cacheable_listing(search: Optional[str], cursor: Optional[str], page: int) -> bool:
+    """
+    Only the bounded filter combinations go through the catalog cache.
+    Free-text searches and cursors are client-chosen strings: caching
+    them would let any request add an entry and push out useful ones.
+    """
+    return not search and not cursor and page <= CACHED_LISTING_PAGES
+
+
+async def known_filter_values(db: AsyncSession, subject: Optional[str], year: Optional[int]) -> bool:
+    """
+    Whether subject and year are values the catalog has (a subject code,
+    a year with published products). Other values are still filtered
+    on, just not cached.
+    """
+    if not subject and not year:
+        return True
+    subject_codes, years = await catalog_cache.get_or_load(
+        ("filter-values",), lambda: load_filter_values(db)
+    )
+    return (not subject or subject.upper() in subject_codes) and (not year or year in years)
+
+
+async def load_filter_values(db: AsyncSession) -> tuple:
+    subject_codes = await db.execute(select(Subject.code).where(Subject.is_active == True))
+    years = await db.execute(select(Product.year).where(Product.is_published == True).distinct())
+    return frozenset(code.upper() for code in subject_codes.scalars()), frozenset(years.scalars())
+
+
+async def load_product_page(
+    db: AsyncSession,
+    grade: Optional[int],
+    subject: Optional[str],
+    term: Optional[int],
+    year: Optional[int],
+    featured: Optional[bool],
+    search: Optional[str],
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+) -> bytes:
+    search_mode = settings.CATALOG_SEARCH_MODE if search else None
+    filters = product_filters(grade, subject, term, year, featured, search, search_mode)
+
+    total_result = await db.execute(
+        select(func.count()).select_from(Product).where(*filters)
+    )
+    total = total_result.scalar_one()
 
-    # Apply filters
-    if grade:
-        query = query.where(Product.grade == grade)
-    if term:
-        query = query.where(Product.term == term)
-    if year:
-        query = query.where(Product.year == year)
-    if featured is not None:
-        query = query.where(Product.is_featured == featured)
-    if subject:
-        query = query.join(Subject).where(
-            or_(Subject.code == subject.upper(), Subject.name.ilike(f"%{subject}%"))
-        )
-    if search:
-        query = query.where(
-            or_(
-                Product.title.ilike(f"%{search}%"),
-                Product.description.ilike(f"%{search}%"),
-            )
+    if search_mode == "fts" and total == 0:
+        search_mode = "trigram"
+        filters = product_filters(grade, subject, term, year, featured, search, search_mode)
+        total_result = await db.execute(
+            select(func.count()).select_from(Product).where(*filters)
         )
+        total = total_result.scalar_one()
 
-    # Count total
-    count_query = select(Product).where(Product.is_published == True)
-    # Apply same filters to count
-    if grade:
-        count_query = count_query.where(Product.grade == grade)
-    if term:
-        count_query = count_query.where(Product.term == term)
-
-    total_result = await db.execute(count_query)
-    total = len(total_result.scalars().all())
+    query = (
+        select(Product)
+        .options(LIST_OPTIONS, selectinload(Product.subject))
+        .where(*filters)
+        .limit(page_size)
+    )
+    rank = search_rank(search, search_mode) if search else None
+    if rank is not None:
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Search results paginate by page, not cursor"
+            )
+        query = query.order_by(rank.desc(), Product.id)
+    else:
+        query = query.order_by(Product.grade, Product.term, Product.id)
 
-    # Pagination
-    offset = (page - 1) * page_size
-    query = query.order_by(Product.grade, Product.term).offset(offset).limit(page_size)
+    if cursor:
+        query = query.where(tuple_(Product.grade, Product.term, Product.id) > decode_cursor(cursor))
+    else:
+        query = query.offset((page - 1) * page_size)
 
     result = await db.execute(query)
     products = result.scalars().all()
+    next_cursor = None
+    if rank is None and len(products) == page_size:
+        next_cursor = encode_cursor(products[-1])
 
-    return ProductListResponse(
-        products=[
-            ProductResponse(
-                id=str(p.id),
-                sku=p.sku,
-                title=p.title,
-                description=p.description,
-                short_description=p.short_description,
-                subject=SubjectResponse(
-                    id=str(p.subject.id),
-                    name=p.subject.name,
-                    code=p.subject.code,
-                    description=p.subject.description,
-                    icon_url=p.subject.icon_url,
-                    color=p.subject.color,
-                ),
-                grade=p.grade,
-                term=p.term,
-                year=p.year,
-                price_zar=p.price_zar,
-                sale_price_zar=p.sale_price_zar,
-                is_on_sale=p.is_on_sale,
-                current_price=p.current_price,
-                discount_percent=p.discount_percent,
-                thumbnail_url=p.thumbnail_url,
-                preview_url=p.preview_url,
-                total_pages=p.total_pages,
-                total_hours=p.total_hours,
-                is_featured=p.is_featured,
-            )
-            for p in products
-        ],
-        total=total,
-        page=page,
-        page_size=page_size,
+    return json_object(
+        {"total": total, "page": page, "page_size": page_size, "next_cursor": next_cursor},
+        "products", product_json.array(products),
+    )
+
+
+@router.get("/facets", response_model=ProductFacetsResponse, dependencies=[Depends(public_cache_headers)])
+async def get_product_facets(
+    grade: Optional[int] = Query(None, ge=6, le=12),
+    subject: Optional[str] = Query(None),
+    term: Optional[int] = Query(None, ge=1, le=4),
+    year: Optional[int] = Query(None),
+    featured: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Product counts per grade, term, subject and year for a filter set.
+
+    Takes the same filters as the product listing. Each facet is counted
+    with every filter except its own, so the other values of a selected
+    facet stay visible with the number they would show. `total` applies
+    all filters and matches the listing's total.
+    """
+    load = lambda: load_product_facets(db, grade, subject, term, year, featured, search)
+    if search or not await known_filter_values(db, subject, year):
+        return await load()
+    key = ("facets", grade, subject and subject.upper(), term, year, featured)
+    return await catalog_cache.get_or_load(key, load)
+
+
+FACETS = {
+    "grade": (Product.grade,),
+    "term": (Product.term,),
+    "subject": (Subject.code, Subject.name),
+    "year": (Product.year,),
+}
+
+
+async def load_product_facets(
+    db: AsyncSession,
+    grade: Optional[int],
+    subject: Optional[str],
+    term: Optional[int],
+    year: Optional[int],
+    featured: Optional[bool],
+    search: Optional[str],
+) -> ProductFacetsResponse:
+    search_mode = settings.CATALOG_SEARCH_MODE if search else None
+    rows = await db.execute(facets_query(grade, subject, term, year, featured, search, search_mode))
+    rows = rows.all()
+
+    # Same typo-tolerant fallback as the listing
+    if search_mode == "fts" and not any(row.facet == "total" and row.count for row in rows):
+        rows = await db.execute(facets_query(grade, subject, term, year, featured, search, "trigram"))
+        rows = rows.all()
+
+    total = 0
+    facets = defaultdict(list)
+    for row in rows:
+        if row.facet == "total":
+            total = row.count
+        elif row.count:
+            value = row.subject_code if row.facet == "subject" else str(getattr(row, row.facet))
+            label = row.subject_name if row.facet == "subject" else value
+            facets[row.facet].append(FacetCount(value=value, label=label, count=row.count))
+
+    for name, values in facets.items():
+        values.sort(key=lambda v: v.label if name == "subject" else int(v.value))
+    return ProductFacetsResponse(total=total, **{name: facets[name] for name in FACETS})
+
+
+def facets_query(
+    grade: Optional[int],
+    subject: Optional[str],
+    term: Optional[int],
+    year: Optional[int],
+    featured: Optional[bool],
+    search: Optional[str],
+    search_mode: Optional[str],
+):
+    """
+    One GROUPING SETS aggregate producing every facet plus the total.
+
+    Filters shared by all facets go in WHERE; each facet's own filter is
+    left out of its count with an aggregate FILTER clause.
+    """
+    common = product_filters(featured=featured, search=search, search_mode=search_mode)
+    facet_filters = {
+        "grade": Product.grade == grade if grade else None,
+        "term": Product.term == term if term else None,
+        "subject": subject_filter(subject) if subject else None,
+        "year": Product.year == year if year else None,
+    }
+
+    def count_without(facet: Optional[str]):
+        clauses = [c for name, c in facet_filters.items() if name != facet and c is not None]
+        return func.count().filter(and_(*clauses)) if clauses else func.count()
+
+    grouped = [(func.grouping(columns[0]) == 0, name) for name, columns in FACETS.items()]
+    facet = case(*grouped, else_="total")
+    count = case(
+        *[(condition, count_without(name)) for condition, name in grouped],
+        else_=count_without(None),
+    )
+    return (
+        select(
+            facet.label("facet"),
+            Product.grade, Product.term, Product.year,
+            Subject.code.label("subject_code"), Subject.name.label("subject_name"),
+            count.label("count"),
+        )
+        .join(Subject, Product.subject_id == Subject.id)
+        .where(*common)
+        .group_by(func.grouping_sets(*[tuple_(*columns) for columns in FACETS.values()], tuple_()))
     )
 
 
 @router.get("/grade/{grade}", response_model=List[ProductResponse])
 async def list_products_by_grade(
     grade: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List all products for a specific grade."""
     if not (6 <= grade <= 12):
@@ -205,219 +487,205 @@ async def list_products_by_grade(
             detail="Grade must be between 6 and 12"
         )
 
+    return catalog_json_response(
+        await catalog_cache.get_or_load(("grade", grade), lambda: load_products_by_grade(db, grade))
+    )
+
+
+async def load_products_by_grade(db: AsyncSession, grade: int) -> bytes:
     result = await db.execute(
         select(Product)
-        .options(selectinload(Product.subject))
+        .options(LIST_OPTIONS, selectinload(Product.subject))
         .where(
             Product.is_published == True,
             Product.grade == grade,
         )
         .order_by(Product.term)
     )
-    products = result.scalars().all()
+    return product_json.array(result.scalars().all())
+
+
+@router.get("/bundles", response_model=List[BundleResponse])
+async def list_bundles(db: AsyncSession = Depends(get_read_db)):
+    """List all available bundles."""
+    return catalog_json_response(
+        await catalog_cache.get_or_load(("bundles",), lambda: load_bundles(db))
+    )
+
+
+async def load_bundles(db: AsyncSession) -> bytes:
+    result = await db.execute(
+        select(Bundle)
+        .options(selectinload(Bundle.products).options(LIST_OPTIONS, selectinload(Product.subject)))
+        .where(Bundle.is_published == True)
+        .order_by(Bundle.price_zar)
+    )
+    return bundle_list_json(result.scalars().all())
+
 
-    return [
-        ProductResponse(
-            id=str(p.id),
-            sku=p.sku,
-            title=p.title,
-            description=p.description,
-            short_description=p.short_description,
-            subject=SubjectResponse(
-                id=str(p.subject.id),
-                name=p.subject.name,
-                code=p.subject.code,
-                description=p.subject.description,
-                icon_url=p.subject.icon_url,
-                color=p.subject.color,
-            ),
-            grade=p.grade,
-            term=p.term,
-            year=p.year,
-            price_zar=p.price_zar,
-            sale_price_zar=p.sale_price_zar,
-            is_on_sale=p.is_on_sale,
-            current_price=p.current_price,
-            discount_percent=p.discount_percent,
-            thumbnail_url=p.thumbnail_url,
-            preview_url=p.preview_url,
-            total_pages=p.total_pages,
-            total_hours=p.total_hours,
-            is_featured=p.is_featured,
+@router.get("/bundles/{sku}", response_model=BundleResponse)
+async def get_bundle(sku: str, db: AsyncSession = Depends(get_read_db)):
+    """Get a bundle by SKU."""
+    bundle = await catalog_cache.get_or_load(("bundle", sku.upper()), lambda: load_bundle(db, sku.upper()))
+
+    if not bundle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bundle not found"
         )
-        for p in products
-    ]
+    return catalog_json_response(bundle)
+
+
+async def load_bundle(db: AsyncSession, sku: str) -> Optional[bytes]:
+    """Published bundle by SKU, or None."""
+    result = await db.execute(
+        select(Bundle)
+        .options(selectinload(Bundle.products).options(LIST_OPTIONS, selectinload(Product.subject)))
+        .where(Bundle.sku == sku)
+    )
+    bundle = result.scalar_one_or_none()
+
+    if not bundle or not bundle.is_published:
+        return None
+
+    return bundle_json(bundle)
 
 
 @router.get("/{sku}", response_model=ProductDetailResponse)
 async def get_product(
     sku: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get a single product by SKU with full content breakdown."""
-    result = await db.execute(
-        select(Product)
-        .options(selectinload(Product.subject))
-        .where(Product.sku == sku.upper())
-    )
-    product = result.scalar_one_or_none()
-
-    if not product:
+    """
+    Get a single product by SKU with full content breakdown.
+
+    Supports If-None-Match; the ETag comes from a lookup that never reads
+    content_json. There is no Last-Modified: subjects have no timestamp,
+    so it couldn't reflect a subject edit the ETag does.
+    """
+    sku = sku.upper()
+    etag = await catalog_cache.get_or_load(("product-etag", sku), lambda: load_product_etag(db, sku))
+    if not etag:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
 
-    if not product.is_published:
+    if is_not_modified(request, etag):
+        return not_modified(etag, cache_control=CATALOG_CACHE_CONTROL)
+
+    product = await catalog_cache.get_or_load(("product", sku), lambda: load_product(db, sku))
+    if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-
-    return ProductDetailResponse(
-        id=str(product.id),
-        sku=product.sku,
-        title=product.title,
-        description=product.description,
-        short_description=product.short_description,
-        subject=SubjectResponse(
-            id=str(product.subject.id),
-            name=product.subject.name,
-            code=product.subject.code,
-            description=product.subject.description,
-            icon_url=product.subject.icon_url,
-            color=product.subject.color,
-        ),
-        grade=product.grade,
-        term=product.term,
-        year=product.year,
-        price_zar=product.price_zar,
-        sale_price_zar=product.sale_price_zar,
-        is_on_sale=product.is_on_sale,
-        current_price=product.current_price,
-        discount_percent=product.discount_percent,
-        thumbnail_url=product.thumbnail_url,
-        preview_url=product.preview_url,
-        total_pages=product.total_pages,
-        total_hours=product.total_hours,
-        is_featured=product.is_featured,
-        content_json=product.content_json,
-    )
+    response = catalog_json_response(product)
+    set_validators(response, etag)
+    return response
 
 
-@router.get("/bundles", response_model=List[BundleResponse])
-async def list_bundles(db: AsyncSession = Depends(get_db)):
-    """List all available bundles."""
+async def load_product_etag(db: AsyncSession, sku: str) -> Optional[str]:
+    """ETag for a published product and its subject, or None."""
     result = await db.execute(
-        select(Bundle)
-        .options(selectinload(Bundle.products).selectinload(Product.subject))
-        .where(Bundle.is_published == True)
-        .order_by(Bundle.price_zar)
-    )
-    bundles = result.scalars().all()
-
-    return [
-        BundleResponse(
-            id=str(b.id),
-            sku=b.sku,
-            title=b.title,
-            description=b.description,
-            price_zar=b.price_zar,
-            original_price_zar=b.original_price_zar,
-            savings=b.savings,
-            discount_percent=b.discount_percent,
-            thumbnail_url=b.thumbnail_url,
-            products=[
-                ProductResponse(
-                    id=str(p.id),
-                    sku=p.sku,
-                    title=p.title,
-                    description=p.description,
-                    short_description=p.short_description,
-                    subject=SubjectResponse(
-                        id=str(p.subject.id),
-                        name=p.subject.name,
-                        code=p.subject.code,
-                        description=p.subject.description,
-                        icon_url=p.subject.icon_url,
-                        color=p.subject.color,
-                    ),
-                    grade=p.grade,
-                    term=p.term,
-                    year=p.year,
-                    price_zar=p.price_zar,
-                    sale_price_zar=p.sale_price_zar,
-                    is_on_sale=p.is_on_sale,
-                    current_price=p.current_price,
-                    discount_percent=p.discount_percent,
-                    thumbnail_url=p.thumbnail_url,
-                    preview_url=p.preview_url,
-                    total_pages=p.total_pages,
-                    total_hours=p.total_hours,
-                    is_featured=p.is_featured,
-                )
-                for p in b.products
-            ],
+        select(
+            Product.id, Product.updated_at,
+            Subject.id, Subject.name, Subject.code, Subject.description, Subject.icon_url, Subject.color,
         )
-        for b in bundles
-    ]
+        .join(Subject, Product.subject_id == Subject.id)
+        .where(Product.sku == sku, Product.is_published == True)
+    )
+    row = result.first()
+    if not row:
+        return None
+    return make_etag(*row)
 
 
-@router.get("/bundles/{sku}", response_model=BundleResponse)
-async def get_bundle(sku: str, db: AsyncSession = Depends(get_db)):
-    """Get a bundle by SKU."""
+async def load_product(db: AsyncSession, sku: str) -> Optional[bytes]:
+    """Published product by SKU, or None."""
     result = await db.execute(
-        select(Bundle)
-        .options(selectinload(Bundle.products).selectinload(Product.subject))
-        .where(Bundle.sku == sku.upper())
+        select(Product)
+        .options(selectinload(Product.subject))
+        .where(Product.sku == sku)
     )
-    bundle = result.scalar_one_or_none()
+    product = result.scalar_one_or_none()
 
-    if not bundle or not bundle.is_published:
+    if not product or not product.is_published:
+        return None
+
+    return product_detail_json(product)
+
+
+# Unit and topic titles/hours, extracted in the database so the rest of
+# content_json never leaves it
+OUTLINE_QUERY = text("""
+    SELECT p.sku, p.title, (
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+            'title', u.value->>'title',
+            'topics', (
+                SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                    'title', t.value->>'title',
+                    'hours', CASE jsonb_typeof(h.hours)
+                        WHEN 'number' THEN h.hours
+                        WHEN 'string' THEN CASE WHEN btrim(h.hours #>> '{}') ~ '^[0-9]+([.][0-9]+)?$'
+                            THEN to_jsonb(btrim(h.hours #>> '{}')::numeric) END
+                    END
+                ) ORDER BY t.ordinality), '[]'::jsonb)
+                FROM jsonb_array_elements(CASE WHEN jsonb_typeof(u.value->'topics') = 'array'
+                    THEN u.value->'topics' ELSE '[]'::jsonb END) WITH ORDINALITY t
+                CROSS JOIN LATERAL (
+                    SELECT COALESCE(t.value->'hours', t.value->'estimated_hours') AS hours
+                ) h
+            )
+        ) ORDER BY u.ordinality), '[]'::jsonb)
+        FROM jsonb_array_elements(CASE WHEN jsonb_typeof(p.content_json->'units') = 'array'
+            THEN p.content_json->'units' ELSE '[]'::jsonb END) WITH ORDINALITY u
+    ) AS units
+    FROM products p
+    WHERE p.sku = :sku AND p.is_published = true
+""").columns(sku=String, title=String, units=JSONB)
+
+
+@router.get("/{sku}/outline", response_model=ProductOutlineResponse, dependencies=[Depends(public_cache_headers)])
+async def get_product_outline(
+    sku: str,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Unit and topic titles with study hours, without the full content."""
+    outline = await catalog_cache.get_or_load(("outline", sku.upper()), lambda: load_product_outline(db, sku.upper()))
+
+    if not outline:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bundle not found"
+            detail="Product not found"
         )
-
-    return BundleResponse(
-        id=str(bundle.id),
-        sku=bundle.sku,
-        title=bundle.title,
-        description=bundle.description,
-        price_zar=bundle.price_zar,
-        original_price_zar=bundle.original_price_zar,
-        savings=bundle.savings,
-        discount_percent=bundle.discount_percent,
-        thumbnail_url=bundle.thumbnail_url,
-        products=[
-            ProductResponse(
-                id=str(p.id),
-                sku=p.sku,
-                title=p.title,
-                description=p.description,
-                short_description=p.short_description,
-                subject=SubjectResponse(
-                    id=str(p.subject.id),
-                    name=p.subject.name,
-                    code=p.subject.code,
-                    description=p.subject.description,
-                    icon_url=p.subject.icon_url,
-                    color=p.subject.color,
-                ),
-                grade=p.grade,
-                term=p.term,
-                year=p.year,
-                price_zar=p.price_zar,
-                sale_price_zar=p.sale_price_zar,
-                is_on_sale=p.is_on_sale,
-                current_price=p.current_price,
-                discount_percent=p.discount_percent,
-                thumbnail_url=p.thumbnail_url,
-                preview_url=p.preview_url,
-                total_pages=p.total_pages,
-                total_hours=p.total_hours,
-                is_featured=p.is_featured,
-            )
-            for p in bundle.products
-        ],
+    return outline
+
+
+async def load_product_outline(db: AsyncSession, sku: str) -> Optional[ProductOutlineResponse]:
+    """Outline of a published product by SKU, or None."""
+    result = await db.execute(OUTLINE_QUERY, {"sku": sku})
+    row = result.first()
+
+    if not row:
+        return None
+
+    units = []
+    for unit in row.units:
+        topics = [
+            TopicOutline(title=topic["title"], hours=topic["hours"])
+            for topic in unit["topics"]
+        ]
+        units.append(UnitOutline(
+            title=unit["title"],
+            hours=sum(topic.hours or 0 for topic in topics),
+            topics=topics,
+        ))
+
+    return ProductOutlineResponse(
+        sku=row.sku,
+        title=row.title,
+        total_hours=sum(unit.hours for unit in units),
+        units=units,
     )
@@ -0,0 +1,72 @@
+import io
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
+from app.core.database import get_db
+from app.api.deps import require_school_admin
+from app.models import User, UserRole, School, SchoolAdmin, SchoolOrder
+from app.services.learner_import import LearnerImportReport, learner_import_service
+
+router = APIRouter()
+
+
+async def get_admin_school(school_id: str, user: User, db: AsyncSession) -> School:
+    """Get a school the user administers (super admins can access any)."""
+    query = select(School).where(School.id == school_id)
+    if user.role != UserRole.SUPER_ADMIN:
+        query = query.join(SchoolAdmin).where(SchoolAdmin.user_id == user.id)
+
+    result = await db.execute(query)
+    school = result.scalar_one_or_none()
+
+    if not school:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="School not found"
+        )
+    return school
+
+
+@router.post("/{school_id}/learners/import", response_model=LearnerImportReport)
+async def import_learners(
+    school_id: str,
+    file: UploadFile = File(...),
+    school_order_id: Optional[str] = None,
+    user: User = Depends(require_school_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Bulk-create learner accounts from a CSV, optionally assigning licenses."""
+    school = await get_admin_school(school_id, user, db)
+
+    school_order = None
+    if school_order_id:
+        result = await db.execute(
+            select(SchoolOrder).where(
+                SchoolOrder.id == school_order_id,
+                SchoolOrder.school_id == school.id,
+            )
+        )
+        school_order = result.scalar_one_or_none()
+        if not school_order:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="School order not found"
+            )
+        if school_order.payment_status != "paid":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="School order has not been paid"
+            )
+
+    # The upload is spooled to disk, so rows are read as they are processed
+    csv_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await learner_import_service.import_csv(db, csv_file, school_order)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV must be UTF-8 encoded"
+        )
+    finally:
+        csv_file.detach()
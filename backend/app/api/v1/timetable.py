@@ -1,17 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import defer, selectinload
 from typing import Optional, List
 from pydantic import BaseModel
 from datetime import date, datetime
-from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.core.database import get_db, get_readonly_db
+from app.core.http_cache import is_not_modified, make_etag, not_modified, set_validators
+from app.api.deps import get_current_user, get_current_user_readonly
 from app.models import User, Product, UserLibrary, Timetable, TimetableProgress
 from app.services.timetable_generator import TimetableGenerator
 
 router = APIRouter()
 
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
 
 class TimetableCreateRequest(BaseModel):
     product_id: str
@@ -148,12 +151,12 @@ async def create_timetable(
 @router.get("", response_model=List[TimetableResponse])
 async def list_timetables(
     active_only: bool = True,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db),
 ):
     """List user's timetables."""
     query = select(Timetable).options(
-        selectinload(Timetable.product)
+        selectinload(Timetable.product).defer(Product.content_json, raiseload=True)
     ).where(Timetable.user_id == user.id)
 
     if active_only:
@@ -185,13 +188,13 @@ async def list_timetables(
 @router.get("/{timetable_id}", response_model=TimetableDetailResponse)
 async def get_timetable(
     timetable_id: str,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db),
 ):
     """Get a specific timetable with full schedule."""
     result = await db.execute(
         select(Timetable)
-        .options(selectinload(Timetable.product))
+        .options(selectinload(Timetable.product).defer(Product.content_json, raiseload=True))
         .where(
             Timetable.id == timetable_id,
             Timetable.user_id == user.id,
@@ -349,8 +352,9 @@ async def delete_timetable(
 @router.get("/{timetable_id}/ical")
 async def export_ical(
     timetable_id: str,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db),
 ):
     """Export timetable as iCal format."""
     result = await db.execute(
@@ -369,16 +373,24 @@ async def export_ical(
             detail="Timetable not found"
         )
 
+    # The calendar is a pure function of these, so the ETag is strong and
+    # the compression middleware can reuse the compressed bytes
+    etag = make_etag(timetable.id, timetable.updated_at, timetable.title, timetable.product.sku)
+    if is_not_modified(request, etag, timetable.updated_at):
+        return not_modified(etag, timetable.updated_at, PRIVATE_CACHE_CONTROL)
+
     # Generate iCal
     ical_content = generate_ical(timetable)
 
-    return Response(
+    response = Response(
         content=ical_content,
         media_type="text/calendar",
         headers={
             "Content-Disposition": f"attachment; filename=rutiva-{timetable.product.sku}.ics"
         }
     )
+    set_validators(response, etag, timetable.updated_at, PRIVATE_CACHE_CONTROL)
+    return response
 
 
 def generate_ical(timetable: Timetable) -> str:
@@ -403,7 +415,7 @@ def generate_ical(timetable: Timetable) -> str:
     preferred_time = timetable.settings.get("preferred_time", "afternoon")
     base_time = time_mapping.get(preferred_time, "15:00")
 
-    for session in timetable.schedule.get("sessions", []):
+    for index, session in enumerate(timetable.schedule.get("sessions", [])):
         session_date = session["date"]
         duration_minutes = session.get("duration_minutes", 90)
 
@@ -421,7 +433,8 @@ def generate_ical(timetable: Timetable) -> str:
         if tasks:
             description += f"\\n\\nTasks:\\n" + "\\n".join(f"- {t}" for t in tasks)
 
-        event_uid = str(uuid.uuid4())
+        # Stable per session so re-imports update events instead of duplicating them
+        event_uid = str(uuid.uuid5(timetable.id, f"{session_date}/{index}"))
 
         lines.extend([
             "BEGIN:VEVENT",
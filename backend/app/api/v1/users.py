@@ -3,8 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
 from pydantic import BaseModel, EmailStr
-from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.core.database import get_db, get_readonly_db
+from app.core.user_cache import user_cache
+from app.api.deps import get_current_user, get_current_user_readonly
 from app.models import User, UserRole
 
 router = APIRouter()
@@ -36,7 +37,7 @@ class UserUpdate(BaseModel):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_profile(user: User = Depends(get_current_user)):
+async def get_current_user_profile(user: User = Depends(get_current_user_readonly)):
     """Get current user's profile."""
     return UserResponse(
         id=str(user.id),
@@ -82,6 +83,7 @@ async def update_current_user(
             user.grade = data.grade
 
     await db.commit()
+    user_cache.invalidate(user.id)
     await db.refresh(user)
 
     return UserResponse(
@@ -100,8 +102,8 @@ async def update_current_user(
 
 @router.get("/me/stats")
 async def get_user_stats(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_readonly_db)
 ):
     """Get user's statistics."""
     from app.models import UserLibrary, Timetable, TimetableProgress
@@ -0,0 +1,259 @@
+import gzip
+import hashlib
+import time
+from collections import defaultdict
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http_cache import coded_etag
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"text/calendar",
+    b"text/html",
+    b"text/plain",
+    b"text/csv",
+)
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codings the client accepts (q > 0) from an Accept-Encoding header."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip())
+    return accepted
+
+
+class RouteCompressionStats:
+    def __init__(self):
+        self.responses = 0
+        self.compressed = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ms = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "responses": self.responses,
+            "compressed": self.compressed,
+            "cache_hits": self.cache_hits,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "cpu_ms": round(self.cpu_ms, 2),
+        }
+
+
+class ResponseCompressor:
+    """
+    Negotiated brotli/gzip compression with a per-worker bytes cache.
+
+    Bodies smaller than `minimum_size`, non-text types and already-encoded
+    bodies are left alone.
+
+    Compressed bytes of cacheable responses are kept so a hot payload is
+    compressed once, not per request. The cache key is the response's
+    strong ETag when it has one, otherwise a digest of the body for public
+    responses. Weak ETags (whose body may still differ) and private
+    responses without an ETag are compressed every time.
+
+    A compressed response's ETag gets a coding suffix ("abc-gzip"), since
+    its bytes differ from the identity body's.
+    """
+
+    def __init__(
+        self,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_size: int = 512,
+        cache_ttl: float = 3600,
+    ):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.routes = defaultdict(RouteCompressionStats)
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def compress_response(self, scope, start_message: dict, body: bytes, encoding: str) -> tuple:
+        """Return the (start message, body) to send, compressed when worthwhile."""
+        headers = {name.lower(): value for name, value in start_message.get("headers", [])}
+        content_type = headers.get(b"content-type", b"").split(b";")[0].strip()
+        compressible = (
+            start_message["status"] not in (204, 304)
+            and b"content-encoding" not in headers
+            and content_type in COMPRESSIBLE_TYPES
+        )
+        if start_message["status"] == 304:
+            return self._not_modified(scope, start_message, headers, encoding), body
+        if not compressible or len(body) < self.minimum_size:
+            return start_message, body
+
+        stats = self.routes[route_name(scope)]
+        stats.responses += 1
+
+        cache_key = self._cache_key(scope, headers, body, encoding)
+        compressed = self.cache.get(cache_key) if cache_key else None
+        if compressed is not None:
+            stats.cache_hits += 1
+        else:
+            started = time.thread_time()
+            compressed = self._compress(body, encoding)
+            stats.cpu_ms += (time.thread_time() - started) * 1000
+            if cache_key:
+                self.cache.set(cache_key, compressed)
+
+        stats.compressed += 1
+        stats.bytes_in += len(body)
+        stats.bytes_out += len(compressed)
+
+        # The compressed bytes are a different representation; give them their own ETag
+        response_headers = [
+            (name, value) for name, value in start_message.get("headers", [])
+            if name.lower() not in (b"content-length", b"vary", b"etag")
+        ]
+        vary = headers.get(b"vary")
+        etag = headers.get(b"etag")
+        if etag:
+            response_headers.append((b"etag", coded_etag(etag.decode("latin-1"), encoding).encode("latin-1")))
+        response_headers += [
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(len(compressed)).encode()),
+            (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+        ]
+        return {**start_message, "headers": response_headers}, compressed
+
+    def _not_modified(self, scope, start_message: dict, headers: dict, encoding: str) -> dict:
+        """
+        A 304 carries the handler's uncoded ETag; send back the coded one
+        when that is what the client revalidated.
+        """
+        etag = headers.get(b"etag")
+        if not etag:
+            return start_message
+        coded = coded_etag(etag.decode("latin-1"), encoding).encode("latin-1")
+        if_none_match = b""
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value
+        if coded not in (tag.strip() for tag in if_none_match.split(b",")):
+            return start_message
+        response_headers = [
+            (name, value) for name, value in start_message.get("headers", [])
+            if name.lower() != b"etag"
+        ]
+        response_headers.append((b"etag", coded))
+        return {**start_message, "headers": response_headers}
+
+    def _cache_key(self, scope, headers: dict, body: bytes, encoding: str) -> Optional[tuple]:
+        etag = headers.get(b"etag")
+        if etag and not etag.startswith(b"W/"):
+            return (scope["path"], etag, encoding)
+        if b"public" in headers.get(b"cache-control", b""):
+            return (hashlib.sha256(body).digest(), encoding)
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def stats(self) -> dict:
+        """Compression ratio and CPU time per route, most expensive first."""
+        return {
+            "encodings": ["br", "gzip"] if brotli is not None else ["gzip"],
+            "minimum_size": self.minimum_size,
+            "cache": self.cache.stats(),
+            "routes": {
+                route: stats.snapshot()
+                for route, stats in sorted(self.routes.items(), key=lambda item: -item[1].cpu_ms)
+            },
+        }
+
+
+class CompressionMiddleware:
+    """
+    Buffer each response and hand it to a ResponseCompressor.
+
+    Streamed responses (more_body, e.g. the tutor's server-sent events)
+    pass through uncompressed.
+    """
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+        encoding = self.compressor.choose_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] != "http.response.body":
+                await send(message)
+            elif message.get("more_body", False):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+            else:
+                start, body = self.compressor.compress_response(
+                    scope, start_message, message.get("body", b""), encoding
+                )
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def route_name(scope) -> str:
+    endpoint = scope.get("endpoint")
+    return endpoint.__name__ if endpoint else scope["path"]
+
+
+response_compressor = ResponseCompressor(
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    cache_size=settings.COMPRESSION_CACHE_SIZE,
+)
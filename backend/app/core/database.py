@@ -1,7 +1,14 @@
+import asyncio
+from typing import Optional
+from uuid import uuid4
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy import MetaData, event, exc, text
 from .config import settings
+from .db_metrics import PoolMetrics, InstrumentedQueuePool, instrument_pool, current_route, route_name
+from .query_stats import instrument_queries
+from .slow_queries import slow_query_log
 
 # Naming convention for constraints
 convention = {
@@ -19,12 +26,40 @@ class Base(DeclarativeBase):
     metadata = metadata
 
 
+def engine_options(metrics: PoolMetrics) -> dict:
+    """Pool and driver options for create_async_engine, from Settings."""
+    connect_args = {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER_MODE:
+        # Transaction pooling hands each transaction a different server
+        # connection, so named prepared statements can't be reused
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    return {
+        "echo": settings.DEBUG,
+        "future": True,
+        "poolclass": InstrumentedQueuePool.with_metrics(metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
 # Async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-)
+pool_metrics = PoolMetrics()
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(pool_metrics))
+instrument_pool(engine.sync_engine, pool_metrics)
+instrument_queries(engine.sync_engine)
+slow_query_log.instrument(engine)
 
 # Async session factory
 async_session_maker = async_sessionmaker(
@@ -36,8 +71,108 @@ async_session_maker = async_sessionmaker(
 )
 
 
-async def get_db() -> AsyncSession:
+# Read-only sessions open "BEGIN READ ONLY DEFERRABLE" (Postgres only honours
+# DEFERRABLE for SERIALIZABLE transactions) and never commit
+READ_ONLY_OPTIONS = {"postgresql_readonly": True, "postgresql_deferrable": True}
+
+
+def read_only_session_maker(bind_engine) -> async_sessionmaker:
+    """Session factory whose transactions are READ ONLY."""
+    return async_sessionmaker(
+        bind_engine.execution_options(**READ_ONLY_OPTIONS),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+        info={"read_only": True},
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def reject_read_only_flush(session, flush_context, instances):
+    """Fail fast if a handler on a read-only session tries to write."""
+    if session.info.get("read_only"):
+        raise exc.InvalidRequestError("Attempted to flush changes in a read-only session")
+
+
+readonly_session_maker = read_only_session_maker(engine)
+
+# Optional read replica for catalog and listing reads
+replica_pool_metrics = PoolMetrics()
+replica_engine = None
+replica_session_maker = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL, **engine_options(replica_pool_metrics)
+    )
+    instrument_pool(replica_engine.sync_engine, replica_pool_metrics)
+    instrument_queries(replica_engine.sync_engine)
+    slow_query_log.instrument(replica_engine)
+    replica_session_maker = read_only_session_maker(replica_engine)
+
+# Seconds behind the primary; 0 when the replica has replayed all WAL it received
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaMonitor:
+    """Tracks replica health and lag so reads can fall back to the primary."""
+
+    def __init__(self, max_lag_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.primary_fallbacks = 0
+
+    @property
+    def use_replica(self) -> bool:
+        return (
+            replica_session_maker is not None
+            and self.healthy
+            and self.lag_seconds is not None
+            and self.lag_seconds <= self.max_lag_seconds
+        )
+
+    async def check(self):
+        """Measure replica lag once, marking it unhealthy on any error."""
+        try:
+            async with replica_engine.connect() as conn:
+                self.lag_seconds = float((await conn.execute(REPLICA_LAG_QUERY)).scalar())
+            self.healthy = True
+            self.last_error = None
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+
+    async def run_forever(self, interval_seconds: int):
+        """Background task: re-check the replica every interval."""
+        while True:
+            await self.check()
+            await asyncio.sleep(interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "configured": replica_engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "serving_reads": self.use_replica,
+            "primary_fallbacks": self.primary_fallbacks,
+            "last_error": self.last_error,
+        }
+
+
+replica_monitor = ReplicaMonitor(settings.REPLICA_MAX_LAG_SECONDS)
+
+
+async def get_db(request: Request) -> AsyncSession:
     """Dependency to get database session."""
+    current_route.set(route_name(request))
     async with async_session_maker() as session:
         try:
             yield session
@@ -49,6 +184,44 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_readonly_db(request: Request) -> AsyncSession:
+    """
+    Dependency for GET endpoints that only read from the primary.
+
+    Transactions are READ ONLY, there is no trailing commit, and any
+    attempt to flush raises.
+    """
+    current_route.set(route_name(request))
+    async with readonly_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Dependency for read-only catalog and listing queries.
+
+    Uses the replica when one is configured, healthy and within the lag
+    limit; otherwise the primary. Sessions are read-only either way.
+    Endpoints that must see the caller's own writes should use get_db or
+    get_readonly_db.
+    """
+    current_route.set(route_name(request))
+    session_maker = readonly_session_maker
+    if replica_monitor.use_replica:
+        session_maker = replica_session_maker
+    elif replica_session_maker is not None:
+        replica_monitor.primary_fallbacks += 1
+
+    async with session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
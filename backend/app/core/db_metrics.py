@@ -0,0 +1,132 @@
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Name of the endpoint currently using the database, for per-route metrics
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+
+def route_name(request) -> str:
+    """Label a request by its endpoint function (bounded cardinality)."""
+    endpoint = request.scope.get("endpoint")
+    return endpoint.__name__ if endpoint else request.url.path
+
+
+class PoolMetrics:
+    """Connection pool telemetry: acquire waits, checkout durations and
+    transaction control statements (BEGIN/COMMIT/ROLLBACK) per route."""
+
+    def __init__(self):
+        self.acquires = 0
+        self.acquire_timeouts = 0
+        self.max_checked_out = 0
+        self.max_overflow_seen = 0
+        self._waits_ms = deque(maxlen=1000)
+        self._max_wait_ms = 0.0
+        self._checkouts = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        self._transactions = defaultdict(lambda: {"begin": 0, "commit": 0, "rollback": 0})
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False):
+        if timed_out:
+            self.acquire_timeouts += 1
+            return
+        self.acquires += 1
+        self._waits_ms.append(wait_ms)
+        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+
+    def record_checkout(self, pool):
+        self.max_checked_out = max(self.max_checked_out, pool.checkedout())
+        self.max_overflow_seen = max(self.max_overflow_seen, pool.overflow())
+
+    def record_checkin(self, route: str, held_ms: float):
+        stats = self._checkouts[route]
+        stats["count"] += 1
+        stats["total_ms"] += held_ms
+        stats["max_ms"] = max(stats["max_ms"], held_ms)
+
+    def record_transaction(self, route: str, statement: str):
+        self._transactions[route][statement] += 1
+
+    def snapshot(self, pool) -> dict:
+        waits = sorted(self._waits_ms)
+        return {
+            "pool": {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_checked_out": self.max_checked_out,
+                "max_overflow": self.max_overflow_seen,
+            },
+            "acquire": {
+                "count": self.acquires,
+                "timeouts": self.acquire_timeouts,
+                "avg_wait_ms": round(sum(waits) / len(waits), 2) if waits else None,
+                "p95_wait_ms": round(waits[int(len(waits) * 0.95) - 1], 2) if waits else None,
+                "max_wait_ms": round(self._max_wait_ms, 2),
+            },
+            "checkout_by_route": {
+                route: {
+                    "count": stats["count"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                }
+                for route, stats in sorted(self._checkouts.items())
+            },
+            "transactions_by_route": {
+                route: dict(counts) for route, counts in sorted(self._transactions.items())
+            },
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+
+    metrics: PoolMetrics = None
+
+    @classmethod
+    def with_metrics(cls, metrics: PoolMetrics):
+        """Pool class bound to a metrics sink (survives pool.recreate())."""
+        return type(cls.__name__, (cls,), {"metrics": metrics})
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(0, timed_out=True)
+            raise
+        self.metrics.record_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+
+def instrument_pool(sync_engine, metrics: PoolMetrics):
+    """Attach checkout/checkin and transaction listeners that feed PoolMetrics."""
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        connection_record.info["route"] = current_route.get()
+        metrics.record_checkout(sync_engine.pool)
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            held_ms = (time.perf_counter() - checked_out_at) * 1000
+            metrics.record_checkin(connection_record.info.pop("route", "-"), held_ms)
+
+    # Each of these is one round trip to the server
+    @event.listens_for(sync_engine, "begin")
+    def on_begin(conn):
+        metrics.record_transaction(current_route.get(), "begin")
+
+    @event.listens_for(sync_engine, "commit")
+    def on_commit(conn):
+        metrics.record_transaction(current_route.get(), "commit")
+
+    @event.listens_for(sync_engine, "rollback")
+    def on_rollback(conn):
+        metrics.record_transaction(current_route.get(), "rollback")
@@ -0,0 +1,167 @@
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from .config import settings
+from .security import pwd_context
+
+
+def hash_password_sync(password: str, rounds: int) -> str:
+    """
+    Hash a password with an explicit bcrypt cost, blocking. Module-level
+    so it can run in a process pool; use password_hasher.hash() in
+    request handlers.
+    """
+    return pwd_context.handler().using(rounds=rounds).hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (runs in a worker)."""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _time_hash(rounds: int) -> float:
+    """Time a single bcrypt hash at the given cost, in milliseconds."""
+    started = time.perf_counter()
+    hash_password_sync("calibration-password", rounds)
+    return (time.perf_counter() - started) * 1000
+
+
+class PasswordHasher:
+    """
+    Async facade over bcrypt that keeps hashing off the event loop.
+
+    - Hashes run in a sized thread (or process) pool
+    - A semaphore caps how many hashes are in flight at once
+    - Tracks queue depth and per-operation latency
+    - Can calibrate the bcrypt cost to a target time on this host
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_concurrency: int,
+        use_processes: bool = False,
+        rounds: Optional[int] = None,
+    ):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.use_processes = use_processes
+        self.rounds = rounds or pwd_context.handler().default_rounds
+
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Metrics
+        self._waiting = 0
+        self._in_flight = 0
+        self._max_waiting = 0
+        self._counts = {"hash": 0, "verify": 0}
+        self._latencies = {"hash": deque(maxlen=1000), "verify": deque(maxlen=1000)}
+        self._calibration: Optional[dict] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                # bcrypt releases the GIL, so threads give real parallelism
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        """Run a hashing function in the pool, respecting the concurrency cap."""
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._in_flight -= 1
+            self._counts[operation] += 1
+            self._latencies[operation].append(elapsed_ms)
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        return await self._run("hash", hash_password_sync, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await self._run("verify", _verify_password, plain_password, hashed_password)
+
+    async def calibrate(
+        self,
+        target_ms: int,
+        min_rounds: int = 10,
+        max_rounds: int = 14,
+    ) -> int:
+        """
+        Pick the bcrypt cost that gets closest to target_ms per hash.
+
+        Each extra round doubles the work, so one timed sample at the
+        minimum cost is enough to extrapolate.
+        """
+        loop = asyncio.get_running_loop()
+        sample_ms = await loop.run_in_executor(self.executor, _time_hash, min_rounds)
+        extra_rounds = math.log2(target_ms / sample_ms) if sample_ms > 0 else 0
+        rounds = max(min_rounds, min(max_rounds, min_rounds + round(extra_rounds)))
+
+        measured_ms = await loop.run_in_executor(self.executor, _time_hash, rounds)
+        self.rounds = rounds
+        self._calibration = {
+            "target_ms": target_ms,
+            "rounds": rounds,
+            "measured_ms": round(measured_ms, 1),
+        }
+        return rounds
+
+    def stats(self) -> dict:
+        """Snapshot of pool usage and hash latency."""
+        latency = {}
+        for operation, samples in self._latencies.items():
+            ordered = sorted(samples)
+            latency[operation] = {
+                "count": self._counts[operation],
+                "avg_ms": round(sum(ordered) / len(ordered), 1) if ordered else None,
+                "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 1) if ordered else None,
+                "max_ms": round(ordered[-1], 1) if ordered else None,
+            }
+
+        return {
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "executor": "process" if self.use_processes else "thread",
+            "rounds": self.rounds,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "in_flight": self._in_flight,
+            "latency": latency,
+            "calibration": self._calibration,
+        }
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    use_processes=settings.PASSWORD_HASH_USE_PROCESSES,
+)
@@ -0,0 +1,95 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    """ETag from the values a representation is built from."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive-UTC or aware datetime for Last-Modified."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+# Codings CompressionMiddleware re-encodes bodies with
+CONTENT_CODINGS = ("br", "gzip")
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag for the body re-encoded with a content coding ("abc" becomes
+    "abc-gzip"), so each byte-different representation has its own
+    strong validator.
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _opaque(tag: str) -> str:
+    """Opaque tag without the weak prefix or a coding suffix."""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for encoding in CONTENT_CODINGS:
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match (weak comparison, as GET allows) or, when the
+    client sent no ETag, If-Modified-Since. Tags the compression
+    middleware gave a coding suffix match the uncoded ETag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def set_validators(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: Optional[str] = None,
+):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """Empty 304 carrying the same validators a 200 would."""
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified, cache_control)
+    return response
@@ -0,0 +1,139 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize_sql(statement: str) -> str:
+    """Strip literals and bind markers so repeats of one query compare equal."""
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class QueryStats:
+    """Statements and database time for one request (or one query_budget)."""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.statements[normalize_sql(statement)] += 1
+        if self.parent is not None:
+            self.parent.record(statement, duration_ms)
+
+    def repeated(self, threshold: int) -> list:
+        """Statements that ran more than `threshold` times, most frequent first."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n > threshold]
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def instrument_queries(sync_engine):
+    """Attach cursor listeners that feed the current request's QueryStats."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, (time.perf_counter() - context._query_started_at) * 1000)
+
+
+class QueryStatsMiddleware:
+    """
+    Count SQL statements and database time per request.
+
+    Adds X-DB-Queries / X-DB-Time-Ms response headers when enabled and
+    logs a warning for statements repeated more than N times (likely an
+    N+1 loop).
+    """
+
+    def __init__(self, app, headers: bool = False, repeat_threshold: int = 0):
+        self.app = app
+        self.headers = headers
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(parent=current_query_stats.get())
+        token = current_query_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.headers:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.total_ms:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_query_stats.reset(token)
+            if self.repeat_threshold:
+                self._warn_repeats(scope, stats)
+
+    def _warn_repeats(self, scope, stats: QueryStats):
+        endpoint = scope.get("endpoint")
+        route = endpoint.__name__ if endpoint else scope["path"]
+        for sql, count in stats.repeated(self.repeat_threshold):
+            logger.warning("Possible N+1 in %s: statement ran %d times: %s", route, count, sql[:300])
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None):
+    """
+    Assert that the code (or requests) inside the block stay within a
+    query budget. Works for in-process calls and for ASGI test clients
+    that run the app in the same task (e.g. httpx ASGITransport):
+
+        with query_budget(3):
+            await client.get("/api/v1/cart")
+    """
+    stats = QueryStats(parent=current_query_stats.get())
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+    assert stats.count <= max_queries, (
+        f"Expected at most {max_queries} queries, ran {stats.count}:\n"
+        + "\n".join(f"{n}x {sql}" for sql, n in stats.statements.most_common())
+    )
+    if max_repeats is not None:
+        repeated = stats.repeated(max_repeats)
+        assert not repeated, f"Statements repeated more than {max_repeats} times: {repeated}"
+
+
+def assert_query_budget(response, max_queries: int):
+    """Check a response's X-DB-Queries header (needs DB_QUERY_STATS_HEADERS)."""
+    assert "x-db-queries" in response.headers, "X-DB-Queries header missing; enable DB_QUERY_STATS_HEADERS"
+    count = int(response.headers["x-db-queries"])
+    assert count <= max_queries, f"{response.request.url.path} ran {count} queries, budget is {max_queries}"
@@ -0,0 +1,173 @@
+import math
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from .config import settings
+from .redis import get_redis
+
+
+class MemoryRateLimitBackend:
+    """In-process token buckets (per worker, LRU-bounded)."""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict = OrderedDict()
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """Take one token. Returns 0 if allowed, else seconds until a token is free."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / refill_per_second
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Refill and take atomically so concurrent workers can't double-spend a bucket
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared by every worker and pod through Redis."""
+
+    def __init__(self):
+        self._script = None
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        if self._script is None:
+            self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+        retry_after = await self._script(
+            keys=[key],
+            args=[capacity, refill_per_second, time.time()],
+        )
+        return float(retry_after)
+
+
+class RateLimiter:
+    """
+    Token-bucket admission control for expensive endpoints.
+
+    Each request spends one token from a bucket keyed by email, when
+    given, and then one keyed by client IP; a request the email bucket
+    rejects doesn't use up the IP's tokens. Callers should check before
+    doing any hashing or database work.
+
+    Behind proxies, set `trusted_proxy_hops` to how many of them append
+    to X-Forwarded-For; the client IP is read that many entries from the
+    right, so clients can't spoof it by sending their own header.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ip_limit: tuple[int, int],
+        email_limit: tuple[int, int],
+        enabled: bool = True,
+        trusted_proxy_hops: int = 0,
+    ):
+        self.backend = backend
+        self.fallback = MemoryRateLimitBackend()
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.enabled = enabled
+        self.trusted_proxy_hops = trusted_proxy_hops
+
+        # Metrics
+        self.allowed = defaultdict(int)
+        self.rejected = defaultdict(int)
+        self.backend_errors = 0
+
+    async def _take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        try:
+            return await self.backend.take(key, capacity, refill_per_second)
+        except Exception:
+            # Keep limiting per worker if the shared backend is unavailable
+            self.backend_errors += 1
+            return await self.fallback.take(key, capacity, refill_per_second)
+
+    def client_ip(self, request: Request) -> str:
+        """The caller's address, as seen by the outermost trusted proxy."""
+        peer = request.client.host if request.client else "unknown"
+        if not self.trusted_proxy_hops:
+            return peer
+        forwarded = [
+            address.strip()
+            for address in request.headers.get("x-forwarded-for", "").split(",")
+            if address.strip()
+        ]
+        if not forwarded:
+            return peer
+        return forwarded[-min(self.trusted_proxy_hops, len(forwarded))]
+
+    async def check(self, request: Request, scope: str, email: Optional[str] = None):
+        """Raise 429 with Retry-After if the email or IP is over its limit."""
+        if not self.enabled:
+            return
+
+        checks = []
+        if email:
+            checks.append(("email", email.lower(), self.email_limit))
+        checks.append(("ip", self.client_ip(request), self.ip_limit))
+
+        for kind, identity, (requests, window_seconds) in checks:
+            retry_after = await self._take(
+                f"ratelimit:{scope}:{kind}:{identity}",
+                requests,
+                requests / window_seconds,
+            )
+            if retry_after > 0:
+                self.rejected[f"{scope}:{kind}"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many attempts. Please try again later.",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+        self.allowed[scope] += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "trusted_proxy_hops": self.trusted_proxy_hops,
+            "ip_limit": {"requests": self.ip_limit[0], "window_seconds": self.ip_limit[1]},
+            "email_limit": {"requests": self.email_limit[0], "window_seconds": self.email_limit[1]},
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+            "backend_errors": self.backend_errors,
+        }
+
+
+auth_rate_limiter = RateLimiter(
+    backend=RedisRateLimitBackend() if settings.RATE_LIMIT_BACKEND == "redis" else MemoryRateLimitBackend(),
+    ip_limit=(settings.RATE_LIMIT_IP_REQUESTS, settings.RATE_LIMIT_IP_WINDOW_SECONDS),
+    email_limit=(settings.RATE_LIMIT_EMAIL_REQUESTS, settings.RATE_LIMIT_EMAIL_WINDOW_SECONDS),
+    enabled=settings.RATE_LIMIT_ENABLED,
+    trusted_proxy_hops=settings.RATE_LIMIT_TRUSTED_PROXY_HOPS,
+)
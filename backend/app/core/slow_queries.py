@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+from sqlalchemy import event
+from .config import settings
+from .db_metrics import current_route
+from .query_stats import current_query_stats, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+
+def redact_params(parameters) -> str:
+    """Describe bind parameters by type only - values may be PII or secrets."""
+    if parameters is None:
+        return "()"
+    if isinstance(parameters, list):
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+class SlowQueryLog:
+    """
+    Log statements slower than a threshold and optionally capture plans.
+
+    A sampled fraction of slow SELECTs is re-run in the background under
+    EXPLAIN (ANALYZE, BUFFERS) in a read-only transaction, at most one at
+    a time. Recent slow statements and plans are kept in ring buffers.
+    """
+
+    def __init__(self, threshold_ms: int, explain_sample_rate: float, buffer_size: int):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.recent = deque(maxlen=buffer_size)
+        self.plans = deque(maxlen=buffer_size)
+        self.slow_count = 0
+        self.explain_failures = 0
+        self._explain_running = False
+        # The loop only holds weak references to tasks
+        self._tasks = set()
+
+    def instrument(self, async_engine):
+        """Attach timing listeners to an async engine."""
+        if not self.threshold_ms:
+            return
+        sync_engine = async_engine.sync_engine
+        explain_engine = async_engine.execution_options(postgresql_readonly=True)
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._slow_query_started_at = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            duration_ms = (time.perf_counter() - context._slow_query_started_at) * 1000
+            if duration_ms >= self.threshold_ms and not statement.lstrip().upper().startswith("EXPLAIN"):
+                self.record(explain_engine, statement, parameters, executemany, duration_ms)
+
+    def record(self, explain_engine, statement: str, parameters, executemany: bool, duration_ms: float):
+        self.slow_count += 1
+        entry = {
+            "sql": normalize_sql(statement),
+            "params": redact_params(parameters),
+            "route": current_route.get(),
+            "duration_ms": round(duration_ms, 1),
+            "at": datetime.utcnow().isoformat(),
+        }
+        self.recent.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s params=%s",
+            duration_ms, entry["route"], entry["sql"], entry["params"],
+        )
+
+        # EXPLAIN ANALYZE executes the statement, so only ever sample reads
+        if (
+            not executemany
+            and not self._explain_running
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < self.explain_sample_rate
+        ):
+            self._explain_running = True
+            task = asyncio.get_running_loop().create_task(
+                self._explain(explain_engine, statement, parameters, entry)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, explain_engine, statement: str, parameters, entry: dict):
+        # The task inherits the request's context; keep EXPLAIN out of its stats
+        current_query_stats.set(None)
+        try:
+            async with explain_engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", tuple(parameters or ())
+                )
+                plan = "\n".join(row[0] for row in result)
+            self.plans.append({**entry, "plan": plan})
+        except Exception as e:
+            self.explain_failures += 1
+            logger.warning("EXPLAIN for slow query failed: %s", e)
+        finally:
+            self._explain_running = False
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "slow_count": self.slow_count,
+            "explain_failures": self.explain_failures,
+            "recent": list(reversed(self.recent)),
+            "plans": list(reversed(self.plans)),
+        }
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    buffer_size=settings.SLOW_QUERY_BUFFER_SIZE,
+)
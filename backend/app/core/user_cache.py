@@ -0,0 +1,78 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from .cache import TTLCache
+from .config import settings
+from .security import TokenPayload, decode_token
+from app.models import User
+
+
+class UserCache:
+    """
+    Per-worker cache for authenticated-user resolution.
+
+    - Decoded JWTs keyed by token digest, never kept past the token's exp
+    - Detached snapshots of active users keyed by user id
+
+    Snapshots are merged into the request session with load=False, so a
+    cache hit costs no SELECT on the users table.
+    """
+
+    def __init__(self, ttl: int, maxsize: int, token_maxsize: int):
+        self.users = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.tokens = TTLCache(maxsize=token_maxsize, ttl=ttl)
+
+    def decode_token(self, token: str) -> Optional[TokenPayload]:
+        """Decode a JWT, reusing the result for repeat requests."""
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self.tokens.get(key)
+        if payload is not None:
+            return payload
+
+        payload = decode_token(token)
+        if payload:
+            remaining = payload.exp.replace(tzinfo=None) - datetime.utcnow()
+            self.tokens.set(key, payload, ttl=remaining.total_seconds())
+        return payload
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        """Get a detached snapshot of an active user."""
+        return self.users.get(str(user_id))
+
+    def set_user(self, user: User):
+        """Cache a detached copy of a loaded user."""
+        if not user.is_active:
+            return
+        snapshot = User(**{
+            column.key: getattr(user, column.key)
+            for column in inspect(User).column_attrs
+        })
+        make_transient_to_detached(snapshot)
+        self.users.set(str(user.id), snapshot)
+
+    def invalidate(self, user_id):
+        """Drop a user's snapshot after their row changes."""
+        self.users.pop(str(user_id))
+
+    def stats(self) -> dict:
+        return {
+            # Each user hit is one users-table SELECT avoided
+            "users": self.users.stats(),
+            "tokens": self.tokens.stats(),
+        }
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    token_maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_deactivation(mapper, connection, target):
+    """Evict users as soon as they are deactivated, wherever that happens."""
+    if inspect(target).attrs.is_active.history.has_changes():
+        user_cache.invalidate(target.id)
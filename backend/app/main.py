@@ -1,8 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+from app.core.compression import CompressionMiddleware, response_compressor
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, replica_engine, replica_monitor
+from app.core.hashing import password_hasher
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.redis import close_redis
+from app.services.learner_import import learner_import_service
+from app.services.otp_store import purge_expired_otps_forever
+from app.services.payment_outbox import payment_outbox
 from app.api.v1 import router as api_v1_router
 
 
@@ -14,8 +22,34 @@ async def lifespan(app: FastAPI):
     # Initialize database tables (in development)
     if settings.DEBUG:
         await init_db()
+    # Pick the bcrypt cost for this host
+    if settings.PASSWORD_HASH_TARGET_MS:
+        rounds = await password_hasher.calibrate(
+            settings.PASSWORD_HASH_TARGET_MS,
+            min_rounds=settings.PASSWORD_HASH_MIN_ROUNDS,
+            max_rounds=settings.PASSWORD_HASH_MAX_ROUNDS,
+        )
+        print(f"Password hashing calibrated to bcrypt cost {rounds}")
+    # Redis expires OTP codes itself; the database and memory stores need purging
+    background_tasks = []
+    if settings.OTP_STORE_BACKEND != "redis":
+        background_tasks.append(asyncio.create_task(
+            purge_expired_otps_forever(settings.OTP_PURGE_INTERVAL_SECONDS)
+        ))
+    if replica_engine is not None:
+        background_tasks.append(asyncio.create_task(
+            replica_monitor.run_forever(settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS)
+        ))
+    # Payment webhooks are only queued; fulfill them in the background
+    if payment_outbox.concurrency:
+        background_tasks.append(asyncio.create_task(payment_outbox.run_forever()))
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    password_hasher.shutdown()
+    learner_import_service.shutdown()
+    await close_redis()
     print(f"Shutting down {settings.APP_NAME}")
 
 
@@ -41,6 +75,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request SQL statement counts and N+1 warnings
+app.add_middleware(
+    QueryStatsMiddleware,
+    headers=settings.DEBUG or settings.DB_QUERY_STATS_HEADERS,
+    repeat_threshold=settings.DB_REPEATED_QUERY_WARN_THRESHOLD,
+)
+
+# Negotiated gzip/brotli for larger JSON and iCal bodies
+app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
 # Include API routes
 app.include_router(api_v1_router, prefix=settings.API_V1_PREFIX)
 
@@ -1,7 +1,7 @@
 # Export all models for easy importing
 from app.models.user import User, UserRole, OTPCode, ParentChild
 from app.models.product import Subject, Product, Bundle, bundle_products
-from app.models.order import Order, OrderItem, OrderStatus, PaymentProvider, UserLibrary, PromoCode
+from app.models.order import Order, OrderItem, OrderStatus, PaymentProvider, UserLibrary, PromoCode, PaymentEvent
 from app.models.timetable import Timetable, TimetableProgress
 from app.models.tutor import TutorSubscription, TutorPlan, ChatSession, ChatMessage
 from app.models.school import School, SchoolAdmin, SchoolOrder, SchoolLicense
@@ -24,6 +24,7 @@ __all__ = [
     "PaymentProvider",
     "UserLibrary",
     "PromoCode",
+    "PaymentEvent",
     # Timetable
     "Timetable",
     "TimetableProgress",
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum as SQLEnum, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum as SQLEnum, Boolean, Index, UniqueConstraint, Text, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import enum
 from app.core.database import Base
@@ -51,6 +51,10 @@ class Order(Base):
     # Promo code
     promo_code_id = Column(UUID(as_uuid=True), ForeignKey("promo_codes.id"), nullable=True)
 
+    # Client-supplied Idempotency-Key of the checkout that created it
+    idempotency_key = Column(String(100), nullable=True)
+    idempotency_request_hash = Column(String(64), nullable=True)  # sha256 of provider + cart
+
     # Timestamps
     paid_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -61,13 +65,19 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", lazy="joined")
     promo_code = relationship("PromoCode")
 
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        # Checkout retries: one order per user and key (NULL keys don't clash)
+        Index("uq_orders_user_id_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
+
 
 class OrderItem(Base):
     """Individual items in an order."""
     __tablename__ = "order_items"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=True)
     bundle_id = Column(UUID(as_uuid=True), ForeignKey("bundles.id"), nullable=True)
 
@@ -88,7 +98,7 @@ class UserLibrary(Base):
     __tablename__ = "user_library"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
     order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
 
@@ -106,7 +116,9 @@ class UserLibrary(Base):
     order = relationship("Order")
 
     __table_args__ = (
-        # Ensure user can't have duplicate products
+        # Ensure user can't have duplicate products (also serves ownership checks)
+        UniqueConstraint("user_id", "product_id", name="uq_user_library"),
+        Index("ix_user_library_user_id_purchased_at", "user_id", "purchased_at"),
         {"sqlite_autoincrement": True},
     )
 
@@ -165,3 +177,37 @@ class PromoCode(Base):
 
 # Import Boolean at module level
 from sqlalchemy import Boolean
+
+
+class PaymentEvent(Base):
+    """Raw payment notifications, queued for the fulfillment workers."""
+    __tablename__ = "payment_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    provider = Column(String(20), nullable=False)  # payfast
+    provider_payment_id = Column(String(100), nullable=False)  # pf_payment_id
+    order_number = Column(String(30), nullable=False)
+    payment_status = Column(String(30), nullable=False)  # COMPLETE, CANCELLED, ...
+    payload = Column(JSONB, nullable=False)
+
+    # Processing
+    status = Column(String(20), default="pending", nullable=False)  # pending, done, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Provider retries of the same notification are dropped on insert
+        UniqueConstraint(
+            "provider", "provider_payment_id", "payment_status",
+            name="uq_payment_events_provider_payment_status",
+        ),
+        # The workers' queue; done events drop out of it
+        Index(
+            "ix_payment_events_queue", "status", "next_attempt_at",
+            postgresql_where=text("status <> 'done'"),
+        ),
+    )
@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Text, DateTime, Boolean, ForeignKey, Table
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Text, DateTime, Boolean, ForeignKey, Table, Index, DDL, event, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.core.database import Base
 
 
@@ -65,6 +65,9 @@ class Product(Base):
     total_hours = Column(Integer, nullable=True)  # Estimated study hours
     difficulty_level = Column(String(20), default="standard")  # foundation, standard, extended
 
+    # Full-text search; maintained by a database trigger, never loaded
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
     # Status
     is_published = Column(Boolean, default=False)
     is_featured = Column(Boolean, default=False)
@@ -76,6 +79,14 @@ class Product(Base):
     bundles = relationship("Bundle", secondary=bundle_products, back_populates="products")
     library_entries = relationship("UserLibrary", back_populates="product", lazy="dynamic")
 
+    __table_args__ = (
+        Index("ix_products_grade_term", "grade", "term"),
+        # Keyset pagination of the published catalog
+        Index("ix_products_published_grade_term_id", "grade", "term", "id", postgresql_where=text("is_published")),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_products_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
     @property
     def current_price(self) -> int:
         """Get current price (sale or regular)."""
@@ -91,6 +102,46 @@ class Product(Base):
         return 0
 
 
+# Full-text search setup for databases built by create_all (init_db), to
+# match migration 004. pg_trgm must exist before the trigram index.
+event.listen(Product.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+event.listen(Product.__table__, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(
+                (SELECT name FROM subjects WHERE id = NEW.subject_id), '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.short_description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(
+                (SELECT string_agg(topic #>> '{}', ' ')
+                 FROM jsonb_path_query(NEW.content_json, '$.units[*].topics[*].title') AS topic), '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""))
+event.listen(Product.__table__, "after_create", DDL("""
+    CREATE TRIGGER products_search_vector
+    BEFORE INSERT OR UPDATE OF title, description, short_description, subject_id, content_json
+    ON products
+    FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+"""))
+event.listen(Product.__table__, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION subjects_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE products SET subject_id = subject_id WHERE subject_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""))
+event.listen(Product.__table__, "after_create", DDL("""
+    CREATE TRIGGER subjects_search_vector
+    AFTER UPDATE OF name ON subjects
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION subjects_search_vector_update()
+"""))
+
 class Bundle(Base):
     """Product bundles (e.g., full year, all subjects)."""
     __tablename__ = "bundles"
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, date
-from sqlalchemy import Column, String, Integer, Text, Date, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, Date, DateTime, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -81,5 +81,6 @@ class TimetableProgress(Base):
 
     __table_args__ = (
         # Unique constraint on timetable + session
+        UniqueConstraint("timetable_id", "session_date", "session_index", name="uq_timetable_progress"),
         {"sqlite_autoincrement": True},
     )
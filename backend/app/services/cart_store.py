@@ -0,0 +1,300 @@
+import json
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+class ItemAlreadyInCart(Exception):
+    pass
+
+
+class CartFull(Exception):
+    pass
+
+
+def empty_cart() -> dict:
+    return {
+        "items": [],
+        "promo_code": None,
+        "promo": None,
+        "subtotal_zar": 0,
+        "version": None,
+        "rev": 0,
+    }
+
+
+def normalize_cart(cart: dict) -> dict:
+    # Empty Lua tables come back from cjson as {}
+    return {**empty_cart(), **cart, "items": list(cart.get("items") or [])}
+
+
+def _matches(item: dict, item_id: str) -> bool:
+    return item.get("product_id") == item_id or item.get("bundle_id") == item_id
+
+
+def _stamp(cart: dict, version: str, empty: bool) -> Optional[str]:
+    """
+    Version for a cart after a priced change: the new version if nothing
+    priced was in it before, unchanged if it matches, else None (stale).
+    """
+    if empty or cart["version"] == version:
+        return version
+    return None
+
+
+class MemoryCartStore:
+    """
+    Carts in this process, for single-worker development.
+
+    Bounded LRU with a sliding TTL; every write refreshes the cart's
+    expiry. Operations have no await between read and write, so they are
+    atomic on the event loop.
+    """
+
+    def __init__(self, ttl_seconds: int, max_items: int, max_carts: int):
+        self.max_items = max_items
+        self._carts = TTLCache(maxsize=max_carts, ttl=ttl_seconds)
+
+    def _load(self, user_id) -> dict:
+        cart = self._carts.get(str(user_id))
+        return normalize_cart(cart) if cart else empty_cart()
+
+    def _save(self, user_id, cart: dict):
+        self._carts.set(str(user_id), {**cart, "rev": cart["rev"] + 1})
+
+    async def get(self, user_id) -> dict:
+        return self._load(user_id)
+
+    async def add_item(self, user_id, field: str, item_id: str, line: dict, version: str) -> int:
+        """Add {field: item_id} with its priced line; returns the new item count."""
+        cart = self._load(user_id)
+        if any(item.get(field) == item_id for item in cart["items"]):
+            raise ItemAlreadyInCart()
+        if len(cart["items"]) >= self.max_items:
+            raise CartFull()
+        cart["version"] = _stamp(cart, version, empty=not cart["items"] and not cart["promo"])
+        cart["items"].append({field: item_id, "line": line})
+        cart["subtotal_zar"] += line["price_zar"]
+        self._save(user_id, cart)
+        return len(cart["items"])
+
+    async def remove_item(self, user_id, item_id: str) -> Optional[int]:
+        """Remove an item; returns the new count, or None if it wasn't there."""
+        cart = self._load(user_id)
+        removed = [item for item in cart["items"] if _matches(item, item_id)]
+        if not removed:
+            return None
+        cart["items"] = [item for item in cart["items"] if not _matches(item, item_id)]
+        for item in removed:
+            if "line" in item:
+                cart["subtotal_zar"] -= item["line"]["price_zar"]
+            else:
+                cart["version"] = None
+        self._save(user_id, cart)
+        return len(cart["items"])
+
+    async def set_promo(self, user_id, code: Optional[str], terms: Optional[dict], version: str):
+        cart = self._load(user_id)
+        cart["version"] = _stamp(cart, version, empty=not cart["items"])
+        cart["promo_code"] = code
+        cart["promo"] = terms
+        self._save(user_id, cart)
+
+    async def save_pricing(self, user_id, rev: int, pricing: dict) -> bool:
+        """
+        Replace items/subtotal/promo/version with a fresh pricing, unless
+        the cart changed (rev moved on) since it was read.
+        """
+        cart = self._carts.get(str(user_id))
+        if not cart or cart["rev"] != rev:
+            return False
+        self._save(user_id, {**normalize_cart(cart), **pricing})
+        return True
+
+    async def clear(self, user_id, rev: Optional[int] = None) -> bool:
+        """Delete the cart; with rev, only if it hasn't changed since read."""
+        cart = self._carts.get(str(user_id))
+        if rev is not None and cart and cart["rev"] != rev:
+            return False
+        self._carts.pop(str(user_id))
+        return True
+
+    async def stats(self) -> dict:
+        carts = self._carts.values()
+        return {
+            "backend": "memory",
+            "carts": len(carts),
+            "items": sum(len(cart["items"]) for cart in carts),
+            # Serialized size; the Python objects take a few times more
+            "approx_bytes": sum(len(json.dumps(cart)) for cart in carts),
+            **{k: v for k, v in self._carts.stats().items() if k not in ("size", "hits", "misses", "hit_ratio")},
+        }
+
+
+# Each script reads, checks and rewrites the cart JSON in one step, so
+# concurrent requests from any worker can't lose each other's updates.
+# They mirror MemoryCartStore; see _stamp for the version rule.
+CART_PRELUDE = """
+local raw = redis.call('GET', KEYS[1])
+local cart = raw and cjson.decode(raw) or {items = {}, subtotal_zar = 0, rev = 0}
+local function save(ttl)
+    cart.rev = (tonumber(cart.rev) or 0) + 1
+    redis.call('SET', KEYS[1], cjson.encode(cart), 'EX', ttl)
+end
+local function stamp(version, empty)
+    if not (empty or cart.version == version) then
+        version = cjson.null
+    end
+    cart.version = version
+end
+"""
+
+ADD_ITEM_SCRIPT = CART_PRELUDE + """
+for _, item in ipairs(cart.items) do
+    if item[ARGV[1]] == ARGV[2] then return -1 end
+end
+if #cart.items >= tonumber(ARGV[4]) then return -2 end
+local line = cjson.decode(ARGV[5])
+stamp(ARGV[6], #cart.items == 0 and (cart.promo == nil or cart.promo == cjson.null))
+table.insert(cart.items, {[ARGV[1]] = ARGV[2], line = line})
+cart.subtotal_zar = (tonumber(cart.subtotal_zar) or 0) + line.price_zar
+save(ARGV[3])
+return #cart.items
+"""
+
+REMOVE_ITEM_SCRIPT = CART_PRELUDE + """
+if not raw then return -1 end
+local items = {}
+local removed = false
+for _, item in ipairs(cart.items) do
+    if item.product_id == ARGV[1] or item.bundle_id == ARGV[1] then
+        removed = true
+        if item.line then
+            cart.subtotal_zar = (tonumber(cart.subtotal_zar) or 0) - item.line.price_zar
+        else
+            cart.version = cjson.null
+        end
+    else
+        table.insert(items, item)
+    end
+end
+if not removed then return -1 end
+cart.items = items
+save(ARGV[2])
+return #items
+"""
+
+SET_PROMO_SCRIPT = CART_PRELUDE + """
+stamp(ARGV[4], #cart.items == 0)
+cart.promo_code = ARGV[1] ~= '' and ARGV[1] or cjson.null
+cart.promo = cjson.decode(ARGV[2])
+save(ARGV[3])
+"""
+
+SAVE_PRICING_SCRIPT = CART_PRELUDE + """
+if not raw or (tonumber(cart.rev) or 0) ~= tonumber(ARGV[1]) then return 0 end
+for key, value in pairs(cjson.decode(ARGV[2])) do
+    cart[key] = value
+end
+save(ARGV[3])
+return 1
+"""
+
+CLEAR_SCRIPT = CART_PRELUDE + """
+if raw and (tonumber(cart.rev) or 0) ~= tonumber(ARGV[1]) then return 0 end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+
+class RedisCartStore:
+    """
+    Carts shared by every worker and pod, one JSON string per user.
+
+    Keys expire `ttl_seconds` after the last change. Redis evictions
+    (maxmemory) are reported from INFO.
+    """
+
+    def __init__(self, ttl_seconds: int, max_items: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self._scripts: dict = {}
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f"cart:{user_id}"
+
+    def _script(self, source: str):
+        if source not in self._scripts:
+            self._scripts[source] = get_redis().register_script(source)
+        return self._scripts[source]
+
+    async def get(self, user_id) -> dict:
+        raw = await get_redis().get(self._key(user_id))
+        return normalize_cart(json.loads(raw)) if raw else empty_cart()
+
+    async def add_item(self, user_id, field: str, item_id: str, line: dict, version: str) -> int:
+        count = await self._script(ADD_ITEM_SCRIPT)(
+            keys=[self._key(user_id)],
+            args=[field, item_id, self.ttl_seconds, self.max_items, json.dumps(line), version],
+        )
+        if count == -1:
+            raise ItemAlreadyInCart()
+        if count == -2:
+            raise CartFull()
+        return count
+
+    async def remove_item(self, user_id, item_id: str) -> Optional[int]:
+        count = await self._script(REMOVE_ITEM_SCRIPT)(
+            keys=[self._key(user_id)], args=[item_id, self.ttl_seconds]
+        )
+        return None if count == -1 else count
+
+    async def set_promo(self, user_id, code: Optional[str], terms: Optional[dict], version: str):
+        await self._script(SET_PROMO_SCRIPT)(
+            keys=[self._key(user_id)],
+            args=[code or "", json.dumps(terms), self.ttl_seconds, version],
+        )
+
+    async def save_pricing(self, user_id, rev: int, pricing: dict) -> bool:
+        saved = await self._script(SAVE_PRICING_SCRIPT)(
+            keys=[self._key(user_id)], args=[rev, json.dumps(pricing), self.ttl_seconds]
+        )
+        return bool(saved)
+
+    async def clear(self, user_id, rev: Optional[int] = None) -> bool:
+        if rev is None:
+            await get_redis().delete(self._key(user_id))
+            return True
+        cleared = await self._script(CLEAR_SCRIPT)(keys=[self._key(user_id)], args=[rev])
+        return bool(cleared)
+
+    async def stats(self) -> dict:
+        redis = get_redis()
+        memory = await redis.info("memory")
+        server_stats = await redis.info("stats")
+        return {
+            "backend": "redis",
+            "ttl_seconds": self.ttl_seconds,
+            "used_memory_bytes": memory.get("used_memory"),
+            "maxmemory_bytes": memory.get("maxmemory"),
+            "maxmemory_policy": memory.get("maxmemory_policy"),
+            "evicted_keys": server_stats.get("evicted_keys"),
+            "expired_keys": server_stats.get("expired_keys"),
+        }
+
+
+def create_cart_store():
+    """Build the cart store selected by CART_STORE_BACKEND."""
+    ttl_seconds = settings.CART_TTL_DAYS * 86400
+    if settings.CART_STORE_BACKEND == "redis":
+        return RedisCartStore(ttl_seconds=ttl_seconds, max_items=settings.CART_MAX_ITEMS)
+    return MemoryCartStore(
+        ttl_seconds=ttl_seconds,
+        max_items=settings.CART_MAX_ITEMS,
+        max_carts=settings.CART_MEMORY_MAX_CARTS,
+    )
+
+
+cart_store = create_cart_store()
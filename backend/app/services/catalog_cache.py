@@ -0,0 +1,218 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Hashable
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models import Product, Bundle, Subject, PromoCode
+
+_MISSING = object()
+CATALOG_MODELS = (Product, Bundle, Subject)
+# Redeeming a promo only bumps its usage counter; that isn't a catalog change
+PROMO_USAGE_FIELDS = {"current_uses"}
+VERSION_KEY = "catalog:version"
+
+
+class LoadAbandoned(Exception):
+    """The request loading a shared entry was cancelled before finishing."""
+
+
+class CatalogCache:
+    """
+    Per-worker cache for catalog reads, guarded by a catalog version.
+
+    Keys are query shapes (e.g. ("product", sku)). Any committed write to
+    products, bundles, subjects or promo code terms bumps the version,
+    which drops every entry. With a shared version the bump goes through Redis and other
+    workers notice it within `poll_seconds`.
+
+    Concurrent misses for the same key share one load (single-flight).
+    If the request running it is cancelled, a waiter takes over.
+    A load that returns None (not found) is shared but not stored, so
+    lookups of made-up keys can't push out real entries.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared_version: bool = False, poll_seconds: float = 2.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: dict = {}
+        self.version = 0
+        self.shared_version = shared_version
+        self.poll_seconds = poll_seconds
+        self._remote_version = _MISSING
+        self._next_poll = 0.0
+        self._instance = uuid.uuid4().hex[:12]
+        self._pending_bumps = 0
+
+        # Metrics
+        self.loads = 0
+        self.coalesced = 0
+        self.abandoned = 0
+        self.invalidations = 0
+        self.version_errors = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, loading it once on a miss."""
+        while True:
+            if self.shared_version:
+                await self._poll_version()
+
+            cache_key = (self.version, key)
+            value = self._cache.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                return await self._load(cache_key, loader)
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except LoadAbandoned:
+                # The leading request was cancelled; the first waiter to
+                # get here takes over the load with its own loader
+                self.abandoned += 1
+
+    async def _load(self, cache_key: tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            self.loads += 1
+            value = await loader()
+        except asyncio.CancelledError:
+            # Don't cancel the waiters with us; tell them to retry
+            future.set_exception(LoadAbandoned())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure isn't logged
+            future.exception()
+            raise
+        else:
+            # Skip storing if the catalog changed while loading
+            if cache_key[0] == self.version and value is not None:
+                self._cache.set(cache_key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[cache_key]
+
+    async def version_token(self) -> str:
+        """
+        The current version as a string that other workers can compare,
+        e.g. to tag data priced from the catalog. Without a shared version
+        the token is unique to this process, so it never matches another
+        worker's and their data is always treated as stale.
+        """
+        if self.shared_version:
+            await self._poll_version()
+            # While our own bump is in flight the shared value is stale
+            if not self._pending_bumps and self._remote_version is not _MISSING:
+                return f"shared:{self._remote_version}"
+        return f"{self._instance}:{self.version}"
+
+    def invalidate(self):
+        """Drop every entry in this worker and, if shared, tell the others."""
+        self._bump_local()
+        if self.shared_version:
+            try:
+                asyncio.get_running_loop().create_task(self._bump_remote())
+                self._pending_bumps += 1
+            except RuntimeError:
+                # No loop (e.g. a sync script) - other workers expire by TTL
+                pass
+
+    def _bump_local(self):
+        self.version += 1
+        self.invalidations += 1
+        self._cache.clear()
+
+    async def _bump_remote(self):
+        try:
+            self._remote_version = str(await get_redis().incr(VERSION_KEY))
+        except Exception:
+            self.version_errors += 1
+        finally:
+            self._pending_bumps -= 1
+
+    async def _poll_version(self):
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_seconds
+        try:
+            remote = await get_redis().get(VERSION_KEY)
+        except Exception:
+            # Redis down: keep serving, entries still expire by TTL
+            self.version_errors += 1
+            return
+        if self._remote_version is not _MISSING and remote != self._remote_version:
+            self._bump_local()
+        self._remote_version = remote
+
+    def stats(self) -> dict:
+        return {
+            **self._cache.stats(),
+            "version": self.version,
+            "shared_version": self.shared_version,
+            "loads": self.loads,
+            "coalesced_loads": self.coalesced,
+            "abandoned_loads": self.abandoned,
+            "invalidations": self.invalidations,
+            "version_errors": self.version_errors,
+        }
+
+
+catalog_cache = CatalogCache(
+    maxsize=settings.CATALOG_CACHE_MAX_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+    shared_version=settings.CATALOG_CACHE_SHARED_VERSION,
+    poll_seconds=settings.CATALOG_CACHE_VERSION_POLL_SECONDS,
+)
+
+
+def _is_catalog_write(obj) -> bool:
+    if isinstance(obj, CATALOG_MODELS):
+        return True
+    if isinstance(obj, PromoCode):
+        state = inspect(obj)
+        return not state.persistent or any(
+            attr.history.has_changes()
+            for attr in state.attrs
+            if attr.key not in PROMO_USAGE_FIELDS
+        )
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def track_catalog_writes(session, flush_context):
+    """Remember that this transaction wrote catalog rows."""
+    if any(
+        _is_catalog_write(obj)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    ):
+        session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def track_catalog_bulk_writes(orm_execute_state):
+    """Same for update()/delete() statements against catalog tables."""
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, CATALOG_MODELS):
+            orm_execute_state.session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_on_catalog_commit(session):
+    if session.info.pop("catalog_changed", False):
+        catalog_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_catalog_writes(session):
+    session.info.pop("catalog_changed", None)
@@ -0,0 +1,130 @@
+from typing import List, Optional
+import orjson
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Product, Subject, Bundle
+
+
+def subject_dict(subject: Subject) -> dict:
+    """The SubjectResponse projection."""
+    return {
+        "id": str(subject.id),
+        "name": subject.name,
+        "code": subject.code,
+        "description": subject.description,
+        "icon_url": subject.icon_url,
+        "color": subject.color,
+    }
+
+
+def product_dict(product: Product) -> dict:
+    """The ProductResponse projection (never touches content_json)."""
+    return {
+        "id": str(product.id),
+        "sku": product.sku,
+        "title": product.title,
+        "description": product.description,
+        "short_description": product.short_description,
+        "subject": subject_dict(product.subject),
+        "grade": product.grade,
+        "term": product.term,
+        "year": product.year,
+        "price_zar": product.price_zar,
+        "sale_price_zar": product.sale_price_zar,
+        "is_on_sale": bool(product.is_on_sale),
+        "current_price": product.current_price,
+        "discount_percent": product.discount_percent,
+        "thumbnail_url": product.thumbnail_url,
+        "preview_url": product.preview_url,
+        "total_pages": product.total_pages,
+        "total_hours": product.total_hours,
+        "is_featured": bool(product.is_featured),
+    }
+
+
+def bundle_fields(bundle: Bundle) -> dict:
+    """BundleResponse without its products."""
+    return {
+        "id": str(bundle.id),
+        "sku": bundle.sku,
+        "title": bundle.title,
+        "description": bundle.description,
+        "price_zar": bundle.price_zar,
+        "original_price_zar": bundle.original_price_zar,
+        "savings": bundle.savings,
+        "discount_percent": bundle.discount_percent,
+        "thumbnail_url": bundle.thumbnail_url,
+    }
+
+
+def product_version(product: Product) -> tuple:
+    """
+    Everything a product card depends on. Subject edits don't touch
+    products.updated_at, so the embedded subject fields are part of it.
+    """
+    subject = product.subject
+    return (
+        product.id, product.updated_at,
+        subject.id, subject.name, subject.code, subject.description, subject.icon_url, subject.color,
+    )
+
+
+class ProductJSONCache:
+    """
+    Serialized product cards (JSON bytes) per product version.
+
+    List responses are assembled by joining these fragments, so a product
+    is serialized once per edit rather than once per response. Entries
+    for old versions simply stop being asked for and age out.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def fragment(self, product: Product) -> bytes:
+        key = product_version(product)
+        data = self._cache.get(key)
+        if data is None:
+            data = orjson.dumps(product_dict(product))
+            self._cache.set(key, data)
+        return data
+
+    def array(self, products: List[Product]) -> bytes:
+        return b"[" + b",".join(self.fragment(p) for p in products) + b"]"
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+product_json = ProductJSONCache(
+    maxsize=settings.CATALOG_CACHE_MAX_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
+
+
+def json_object(fields: dict, key: Optional[str] = None, array: bytes = b"") -> bytes:
+    """
+    Serialize fields as a JSON object, optionally appending one member
+    whose value is already-serialized JSON (e.g. a product_json.array).
+    """
+    data = orjson.dumps(fields)
+    if key is None:
+        return data
+    separator = b"," if fields else b""
+    return data[:-1] + separator + orjson.dumps(key) + b":" + array + b"}"
+
+
+def product_detail_json(product: Product) -> bytes:
+    return orjson.dumps({**product_dict(product), "content_json": product.content_json})
+
+
+def bundle_json(bundle: Bundle) -> bytes:
+    return json_object(bundle_fields(bundle), "products", product_json.array(bundle.products))
+
+
+def bundle_list_json(bundles: List[Bundle]) -> bytes:
+    return b"[" + b",".join(bundle_json(b) for b in bundles) + b"]"
+
+
+def subject_list_json(subjects: List[Subject]) -> bytes:
+    return orjson.dumps([subject_dict(s) for s in subjects])
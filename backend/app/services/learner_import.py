@@ -0,0 +1,240 @@
+import asyncio
+import csv
+import secrets
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Optional, TextIO
+from email_validator import EmailNotValidError, validate_email
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.hashing import hash_password_sync, password_hasher
+from app.models import User, UserRole, SchoolOrder, SchoolLicense
+
+MAX_REPORTED_ERRORS = 1000
+# Longest values the users columns take
+MAX_LENGTHS = {
+    "email": User.__table__.c.email.type.length,
+    "first_name": User.__table__.c.first_name.type.length,
+    "last_name": User.__table__.c.last_name.type.length,
+}
+
+
+def _hash_batch(passwords: List[str], rounds: int) -> List[str]:
+    """Hash a chunk of passwords (runs in a worker process)."""
+    return [hash_password_sync(password, rounds) for password in passwords]
+
+
+class RowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class LearnerImportReport(BaseModel):
+    total_rows: int = 0
+    created: int = 0
+    duplicates: int = 0
+    licensed: int = 0
+    failed: int = 0
+    errors: List[RowError] = []
+    elapsed_seconds: float = 0
+    rows_per_second: float = 0
+
+
+class LearnerImportService:
+    """
+    Bulk-create learner accounts for a school from a CSV.
+
+    CSV columns: email, first_name, last_name, grade (optional),
+    password (optional - a random one is set when blank, and the learner
+    resets it by OTP).
+
+    - Rows are streamed and processed in batches
+    - Passwords are hashed across a process pool, shared by imports and
+      started on first use
+    - Each batch is one multi-row INSERT ... ON CONFLICT (email) DO NOTHING
+    - Licenses from a school order can be assigned in the same pass.
+      A license is the only link between a learner and a school, so
+      rows imported without one (no order, unpaid, or out of licenses)
+      are not associated with the school
+    """
+
+    def __init__(self, batch_size: int = None, hash_workers: int = None):
+        self.batch_size = batch_size or settings.LEARNER_IMPORT_BATCH_SIZE
+        self.hash_workers = hash_workers or settings.LEARNER_IMPORT_HASH_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.hash_workers)
+        return self._executor
+
+    def shutdown(self):
+        """Stop the hashing pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def import_csv(
+        self,
+        db: AsyncSession,
+        csv_file: TextIO,
+        school_order: Optional[SchoolOrder] = None,
+    ) -> LearnerImportReport:
+        """Import learners from an open CSV file, committing per batch."""
+        report = LearnerImportReport()
+        started = time.perf_counter()
+
+        licenses_left = 0
+        # Licenses only come from paid orders
+        if school_order and school_order.payment_status == "paid":
+            result = await db.execute(
+                select(func.count(SchoolLicense.id)).where(SchoolLicense.order_id == school_order.id)
+            )
+            licenses_left = max(0, school_order.learner_count - result.scalar_one())
+
+        seen_emails = set()
+        batch = []
+
+        # Header is line 1, so data rows start at 2
+        for row_number, row in enumerate(csv.DictReader(csv_file), start=2):
+            report.total_rows += 1
+            learner = self._parse_row(row, row_number, seen_emails, report)
+            if learner:
+                batch.append(learner)
+
+            if len(batch) >= self.batch_size:
+                licenses_left = await self._write_batch(db, batch, school_order, licenses_left, report)
+                batch = []
+
+        if batch:
+            await self._write_batch(db, batch, school_order, licenses_left, report)
+
+        report.elapsed_seconds = round(time.perf_counter() - started, 2)
+        if report.elapsed_seconds:
+            report.rows_per_second = round(report.total_rows / report.elapsed_seconds, 1)
+        return report
+
+    def _parse_row(self, row: dict, row_number: int, seen_emails: set, report: LearnerImportReport) -> Optional[dict]:
+        """Validate one CSV row, recording an error and returning None if bad."""
+        email = (row.get("email") or "").strip().lower()
+
+        def fail(error: str):
+            report.failed += 1
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                report.errors.append(RowError(row=row_number, email=email or None, error=error))
+
+        try:
+            email = validate_email(email, check_deliverability=False).normalized.lower()
+        except EmailNotValidError as e:
+            return fail(f"Invalid email: {e}")
+        if len(email) > MAX_LENGTHS["email"]:
+            return fail(f"Email is longer than {MAX_LENGTHS['email']} characters")
+
+        if email in seen_emails:
+            return fail("Duplicate email in file")
+
+        first_name = (row.get("first_name") or "").strip()
+        last_name = (row.get("last_name") or "").strip()
+        if not first_name or not last_name:
+            return fail("first_name and last_name are required")
+        for field, value in (("first_name", first_name), ("last_name", last_name)):
+            if len(value) > MAX_LENGTHS[field]:
+                return fail(f"{field} is longer than {MAX_LENGTHS[field]} characters")
+
+        grade = None
+        if (row.get("grade") or "").strip():
+            try:
+                grade = int(row["grade"])
+            except ValueError:
+                return fail("Grade must be a number")
+            if not (6 <= grade <= 12):
+                return fail("Grade must be between 6 and 12")
+
+        seen_emails.add(email)
+        return {
+            "email": email,
+            "first_name": first_name,
+            "last_name": last_name,
+            "grade": grade,
+            "password": (row.get("password") or "").strip() or secrets.token_urlsafe(16),
+        }
+
+    async def _hash_passwords(self, passwords: List[str]) -> List[str]:
+        """Spread a batch of passwords across the worker processes."""
+        loop = asyncio.get_running_loop()
+        chunk_size = max(1, -(-len(passwords) // self.hash_workers))
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self.executor, _hash_batch, chunk, password_hasher.rounds)
+            for chunk in chunks
+        ])
+        return [password_hash for chunk in results for password_hash in chunk]
+
+    async def _write_batch(
+        self,
+        db: AsyncSession,
+        batch: List[dict],
+        school_order: Optional[SchoolOrder],
+        licenses_left: int,
+        report: LearnerImportReport,
+    ) -> int:
+        """Insert one batch of learners (and licenses). Returns licenses left."""
+        password_hashes = await self._hash_passwords([learner["password"] for learner in batch])
+        now = datetime.utcnow()
+
+        result = await db.execute(
+            insert(User)
+            .values([
+                {
+                    "id": uuid.uuid4(),
+                    "email": learner["email"],
+                    "password_hash": password_hash,
+                    "role": UserRole.STUDENT,
+                    "first_name": learner["first_name"],
+                    "last_name": learner["last_name"],
+                    "grade": learner["grade"],
+                    "email_verified": False,
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for learner, password_hash in zip(batch, password_hashes)
+            ])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id)
+        )
+        created_ids = result.scalars().all()
+        report.created += len(created_ids)
+        report.duplicates += len(batch) - len(created_ids)
+
+        if school_order and licenses_left and created_ids:
+            licensed_ids = created_ids[:licenses_left]
+            await db.execute(
+                insert(SchoolLicense).values([
+                    {
+                        "id": uuid.uuid4(),
+                        "order_id": school_order.id,
+                        "user_id": user_id,
+                        "license_code": secrets.token_hex(8).upper(),
+                        "is_claimed": True,
+                        "claimed_at": now,
+                        "created_at": now,
+                    }
+                    for user_id in licensed_ids
+                ])
+            )
+            report.licensed += len(licensed_ids)
+            licenses_left -= len(licensed_ids)
+
+        await db.commit()
+        return licenses_left
+
+
+learner_import_service = LearnerImportService()
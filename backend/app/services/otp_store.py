@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.redis import get_redis
+from app.models import OTPCode
+
+
+class DatabaseOTPStore:
+    """
+    OTP codes in the otp_codes table.
+
+    Codes are deleted as they are consumed and each user keeps at most
+    `max_active` live codes per purpose, so lookups stay on a tiny index
+    range. Expired rows are removed by purge_expired().
+    """
+
+    def __init__(self, max_active: int):
+        self.max_active = max_active
+
+    async def issue(self, db: AsyncSession, user_id, purpose: str, code: str, ttl_seconds: int):
+        db.add(OTPCode(
+            user_id=user_id,
+            code=code,
+            purpose=purpose,
+            expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+        ))
+        await db.flush()
+
+        # Drop everything but the newest codes for this user and purpose
+        stale = (
+            select(OTPCode.id)
+            .where(OTPCode.user_id == user_id, OTPCode.purpose == purpose)
+            .order_by(OTPCode.created_at.desc())
+            .offset(self.max_active)
+        )
+        await db.execute(delete(OTPCode).where(OTPCode.id.in_(stale)))
+
+    async def consume(self, db: AsyncSession, user_id, purpose: str, code: str) -> bool:
+        """Atomically use a code - a single DELETE ... RETURNING."""
+        result = await db.execute(
+            delete(OTPCode)
+            .where(
+                OTPCode.user_id == user_id,
+                OTPCode.purpose == purpose,
+                OTPCode.code == code,
+                OTPCode.used == False,
+                OTPCode.expires_at > datetime.utcnow(),
+            )
+            .returning(OTPCode.id)
+        )
+        return result.first() is not None
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """Delete expired and already-used rows."""
+        result = await db.execute(
+            delete(OTPCode).where(
+                or_(OTPCode.expires_at <= datetime.utcnow(), OTPCode.used == True)
+            )
+        )
+        return result.rowcount
+
+
+class MemoryOTPStore:
+    """In-process OTP codes for single-worker development."""
+
+    def __init__(self, max_active: int):
+        self.max_active = max_active
+        self._codes: dict = {}
+
+    def _live_codes(self, user_id, purpose: str) -> OrderedDict:
+        key = (str(user_id), purpose)
+        codes = self._codes.setdefault(key, OrderedDict())
+        now = time.monotonic()
+        for code, expires_at in list(codes.items()):
+            if expires_at <= now:
+                del codes[code]
+        return codes
+
+    async def issue(self, db: AsyncSession, user_id, purpose: str, code: str, ttl_seconds: int):
+        codes = self._live_codes(user_id, purpose)
+        codes[code] = time.monotonic() + ttl_seconds
+        codes.move_to_end(code)
+        while len(codes) > self.max_active:
+            codes.popitem(last=False)
+
+    async def consume(self, db: AsyncSession, user_id, purpose: str, code: str) -> bool:
+        # No await between check and delete, so this is atomic on the loop
+        codes = self._live_codes(user_id, purpose)
+        used = codes.pop(code, None) is not None
+        if not codes:
+            del self._codes[(str(user_id), purpose)]
+        return used
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        purged = 0
+        for key in list(self._codes):
+            codes = self._codes[key]
+            before = len(codes)
+            self._live_codes(*key)
+            purged += before - len(codes)
+            if not codes:
+                del self._codes[key]
+        return purged
+
+
+# Use a code only if it is still live, in one round trip
+CONSUME_SCRIPT = """
+local expires_at = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if expires_at and tonumber(expires_at) > tonumber(ARGV[2]) then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+class RedisOTPStore:
+    """
+    OTP codes in Redis, one sorted set per user and purpose.
+
+    Members are codes scored by expiry time; the key itself expires with
+    the newest code, so nothing needs purging.
+    """
+
+    def __init__(self, max_active: int):
+        self.max_active = max_active
+        self._consume = None
+
+    @staticmethod
+    def _key(user_id, purpose: str) -> str:
+        return f"otp:{purpose}:{user_id}"
+
+    async def issue(self, db: AsyncSession, user_id, purpose: str, code: str, ttl_seconds: int):
+        key = self._key(user_id, purpose)
+        now = time.time()
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, "-inf", now)
+            pipe.zadd(key, {code: now + ttl_seconds})
+            pipe.zremrangebyrank(key, 0, -(self.max_active + 1))
+            pipe.expire(key, ttl_seconds)
+            await pipe.execute()
+
+    async def consume(self, db: AsyncSession, user_id, purpose: str, code: str) -> bool:
+        if self._consume is None:
+            self._consume = get_redis().register_script(CONSUME_SCRIPT)
+        used = await self._consume(keys=[self._key(user_id, purpose)], args=[code, time.time()])
+        return bool(used)
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        return 0
+
+
+def create_otp_store():
+    """Build the OTP store selected by OTP_STORE_BACKEND."""
+    backends = {
+        "database": DatabaseOTPStore,
+        "memory": MemoryOTPStore,
+        "redis": RedisOTPStore,
+    }
+    return backends[settings.OTP_STORE_BACKEND](max_active=settings.OTP_MAX_ACTIVE_PER_USER)
+
+
+otp_store = create_otp_store()
+
+
+async def purge_expired_otps_forever(interval_seconds: int):
+    """Background task: periodically delete expired OTP codes."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with async_session_maker() as db:
+                purged = await otp_store.purge_expired(db)
+                await db.commit()
+            if purged:
+                print(f"Purged {purged} expired OTP codes")
+        except Exception as e:
+            print(f"OTP purge failed: {e}")
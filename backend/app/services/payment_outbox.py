@@ -0,0 +1,323 @@
+import asyncio
+import statistics
+from collections import deque
+from typing import Optional
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, func, literal, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models import (
+    Order, OrderItem, OrderStatus, PaymentEvent, PromoCode, UserLibrary, bundle_products
+)
+
+
+class PermanentPaymentError(Exception):
+    """The event can never be applied (e.g. unknown order); don't retry it."""
+
+
+async def apply_payment_event(db: AsyncSession, event: PaymentEvent):
+    """Update the order for one notification and fulfill it once paid. Doesn't commit."""
+    result = await db.execute(
+        select(Order)
+        .options(noload(Order.items))
+        .where(Order.order_number == event.order_number)
+        .with_for_update()
+    )
+    order = result.scalar_one_or_none()
+
+    if not order:
+        raise PermanentPaymentError(f"Order {event.order_number} not found")
+
+    if event.payment_status == "COMPLETE":
+        # Already paid through another notification
+        if order.status == OrderStatus.PAID:
+            return
+        order.status = OrderStatus.PAID
+        order.paid_at = datetime.utcnow()
+        order.payment_reference = event.payload.get("pf_payment_id")
+
+        # Add products to user's library
+        await fulfill_order(order, db)
+
+    elif event.payment_status == "CANCELLED":
+        if order.status != OrderStatus.PAID:
+            order.status = OrderStatus.CANCELLED
+
+
+async def fulfill_order(order: Order, db: AsyncSession):
+    """
+    Add purchased products to user's library and count the promo use,
+    one statement each. Doesn't commit.
+
+    Products come from the order's items, with bundles expanded through
+    bundle_products. ON CONFLICT skips products the user already owns,
+    including ones a concurrent fulfillment has just inserted.
+    """
+    product_id = func.coalesce(bundle_products.c.product_id, OrderItem.product_id)
+    # Distinct first: a product bought alone and in a bundle (or in two
+    # bundles) is one library row
+    product_ids = (
+        select(product_id.label("product_id"))
+        .select_from(OrderItem)
+        .outerjoin(bundle_products, bundle_products.c.bundle_id == OrderItem.bundle_id)
+        .where(OrderItem.order_id == order.id, product_id.isnot(None))
+        .distinct()
+        .subquery()
+    )
+    purchased = select(
+        func.gen_random_uuid(),
+        literal(order.user_id, PG_UUID(as_uuid=True)),
+        product_ids.c.product_id,
+        literal(order.id, PG_UUID(as_uuid=True)),
+        literal(0),
+        literal(0),
+        literal(datetime.utcnow(), DateTime),
+    )
+    await db.execute(
+        pg_insert(UserLibrary)
+        .from_select(
+            ["id", "user_id", "product_id", "order_id", "download_count", "progress_percent", "purchased_at"],
+            purchased,
+            include_defaults=False,
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "product_id"])
+    )
+
+    # Update promo code usage
+    if order.promo_code_id:
+        await db.execute(
+            update(PromoCode)
+            .where(PromoCode.id == order.promo_code_id)
+            .values(current_uses=PromoCode.current_uses + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class PaymentOutbox:
+    """
+    Durable queue of payment notifications in the payment_events table.
+
+    Webhooks only record the event (record) and return. Workers claim one
+    event at a time with FOR UPDATE SKIP LOCKED, so any number of workers
+    across processes can share the table. The claim commits on its own,
+    counting the attempt and scheduling the next one with exponential
+    backoff; then the order update, fulfillment and marking the event
+    done commit together. A failed attempt is rolled back and simply
+    waits for its scheduled retry. After max_attempts, or on a
+    PermanentPaymentError, the event is marked failed.
+
+    Counters and processing lag are per process; queue depth comes from
+    the table.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval: float,
+        max_attempts: int,
+        backoff_seconds: float,
+        max_backoff_seconds: float = 3600,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._wakeup = asyncio.Event()
+        self.recorded = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_error = None
+        self._lag_seconds = deque(maxlen=500)
+
+    async def record(self, db: AsyncSession, provider: str, data: dict) -> bool:
+        """
+        Store a notification, unless the provider already sent this
+        payment/status pair. Returns False for such duplicates. Doesn't
+        commit; call notify() once committed.
+        """
+        result = await db.execute(
+            pg_insert(PaymentEvent)
+            .values(
+                provider=provider,
+                provider_payment_id=str(data.get("pf_payment_id") or data["m_payment_id"]),
+                order_number=str(data["m_payment_id"]),
+                payment_status=str(data.get("payment_status") or ""),
+                payload=data,
+            )
+            .on_conflict_do_nothing(
+                index_elements=["provider", "provider_payment_id", "payment_status"]
+            )
+            .returning(PaymentEvent.id)
+        )
+        if result.first() is None:
+            self.duplicates += 1
+            return False
+        self.recorded += 1
+        return True
+
+    def notify(self):
+        """Wake this process's idle workers instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.backoff_seconds * 2 ** (attempts - 1), self.max_backoff_seconds)
+
+    async def _claim(self) -> Optional[tuple]:
+        """
+        Take one due event in a short transaction of its own: count the
+        attempt and push next_attempt_at out by the backoff up front, so
+        the retry is scheduled even if applying it fails in a way that
+        can't be recorded (e.g. the connection drops). Returns
+        (id, attempts), or None when nothing is due.
+        """
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(PaymentEvent)
+                .where(
+                    PaymentEvent.status == "pending",
+                    PaymentEvent.next_attempt_at <= datetime.utcnow(),
+                )
+                .order_by(PaymentEvent.next_attempt_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            event = result.scalar_one_or_none()
+            if not event:
+                return None
+
+            event_id = event.id
+            if event.attempts >= self.max_attempts:
+                # Earlier attempts died before they could record a failure
+                event.status = "failed"
+                self.failed += 1
+                print(f"Payment event {event_id} failed after {event.attempts} attempts: {event.last_error}")
+                await db.commit()
+                return event_id, None
+
+            attempts = event.attempts + 1
+            event.attempts = attempts
+            event.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.backoff(attempts))
+            await db.commit()
+        return event_id, attempts
+
+    async def _apply(self, event_id) -> Optional[datetime]:
+        """
+        Apply a claimed event and mark it done, in one transaction.
+        Returns when it was received, or None if another worker has it.
+        """
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(PaymentEvent)
+                .where(PaymentEvent.id == event_id, PaymentEvent.status == "pending")
+                .with_for_update(skip_locked=True)
+            )
+            event = result.scalar_one_or_none()
+            if not event:
+                return None
+
+            await apply_payment_event(db, event)
+            event.status = "done"
+            event.processed_at = datetime.utcnow()
+            event.last_error = None
+            received_at = event.received_at
+            await db.commit()
+        return received_at
+
+    async def process_one(self) -> bool:
+        """Claim and apply one due event. Returns False when none is due."""
+        claimed = await self._claim()
+        if claimed is None:
+            return False
+        event_id, attempts = claimed
+        if attempts is None:
+            return True
+
+        try:
+            received_at = await self._apply(event_id)
+        except Exception as e:
+            # Already rescheduled by the claim; record why, and give up if final
+            self.last_error = f"{type(e).__name__}: {e}"
+            values = {"last_error": self.last_error}
+            if isinstance(e, PermanentPaymentError) or attempts >= self.max_attempts:
+                values["status"] = "failed"
+                self.failed += 1
+                print(f"Payment event {event_id} failed after {attempts} attempts: {self.last_error}")
+            else:
+                self.retried += 1
+            async with async_session_maker() as db:
+                await db.execute(
+                    update(PaymentEvent).where(PaymentEvent.id == event_id).values(**values)
+                )
+                await db.commit()
+            return True
+
+        if received_at is not None:
+            self.processed += 1
+            self._lag_seconds.append((datetime.utcnow() - received_at).total_seconds())
+        return True
+
+    async def _work_forever(self):
+        while True:
+            try:
+                if await self.process_one():
+                    continue
+            except Exception as e:
+                # Database unavailable etc.; a claimed event is retried after its backoff
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Payment outbox worker error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def run_forever(self):
+        """Background task: run `concurrency` workers."""
+        await asyncio.gather(*(self._work_forever() for _ in range(self.concurrency)))
+
+    async def stats(self) -> dict:
+        """Queue depth and age from the table, plus this process's counters."""
+        now = datetime.utcnow()
+        pending = PaymentEvent.status == "pending"
+        async with async_session_maker() as db:
+            row = (await db.execute(
+                select(
+                    func.count().filter(pending),
+                    func.count().filter(pending, PaymentEvent.next_attempt_at <= now),
+                    func.count().filter(PaymentEvent.status == "failed"),
+                    func.min(PaymentEvent.received_at).filter(pending),
+                ).where(PaymentEvent.status != "done")
+            )).one()
+        pending_count, due_count, failed_count, oldest_pending = row
+        lags = sorted(self._lag_seconds)
+        return {
+            "workers": self.concurrency,
+            "pending": pending_count,
+            "due": due_count,
+            "failed": failed_count,
+            "oldest_pending_age_seconds": (
+                round((now - oldest_pending).total_seconds(), 3) if oldest_pending else None
+            ),
+            "recorded": self.recorded,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed_here": self.failed,
+            "lag_p50_seconds": round(statistics.median(lags), 3) if lags else None,
+            "lag_max_seconds": round(lags[-1], 3) if lags else None,
+            "last_error": self.last_error,
+        }
+
+
+payment_outbox = PaymentOutbox(
+    concurrency=settings.PAYMENT_OUTBOX_WORKERS,
+    poll_interval=settings.PAYMENT_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.PAYMENT_OUTBOX_MAX_ATTEMPTS,
+    backoff_seconds=settings.PAYMENT_OUTBOX_BACKOFF_SECONDS,
+)
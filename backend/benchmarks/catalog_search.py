@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compare catalog search modes: ilike vs full-text (ts_rank) vs trigram.
+
+Seeds a scratch schema with a synthetic catalog (20k products by
+default), builds the search vector and indexes from
+004_catalog_search, then times the real list_products filter and rank
+expressions (count + first ranked page) for each mode. The scratch
+schema shadows the real tables through search_path and is dropped
+afterwards unless --keep is given.
+
+Usage (from backend/):
+    python -m benchmarks.catalog_search
+    python -m benchmarks.catalog_search --products 50000 --repeat 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.api.v1.products import product_filters, search_rank
+from app.models import Product
+
+SCHEMA = "bench_catalog_search"
+
+TABLES = """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public;
+    CREATE TABLE subjects (id uuid PRIMARY KEY, name varchar(100), code varchar(20));
+    CREATE TABLE products (
+        id uuid PRIMARY KEY, sku varchar(50), title varchar(255), description text,
+        short_description varchar(500), subject_id uuid, grade int, term int, year int,
+        is_published boolean, is_featured boolean, content_json jsonb, search_vector tsvector
+    );
+"""
+
+SUBJECTS = ["Mathematics", "Physical Sciences", "Life Sciences", "English", "Geography",
+            "History", "Accounting", "Economics", "Business Studies", "Afrikaans"]
+
+TOPICS = ["algebra", "functions", "trigonometry", "geometry", "probability", "statistics",
+          "calculus", "photosynthesis", "genetics", "evolution", "ecology", "electricity",
+          "magnetism", "momentum", "chemical bonding", "organic chemistry", "essay writing",
+          "poetry", "climatology", "mapwork", "apartheid", "cold war", "ledgers",
+          "inflation", "entrepreneurship", "comprehension"]
+
+SEED = """
+    INSERT INTO products
+    SELECT md5('p' || n)::uuid,
+           'SKU-' || n,
+           s.name || ' Grade ' || (6 + n % 7) || ' Term ' || (1 + n % 4) || ': ' || t1 || ' and ' || t2,
+           'A CAPS-aligned study guide covering ' || t1 || ', ' || t2 || ' and exam practice for '
+               || s.name || '. Includes worked examples, summaries and past paper questions.',
+           'Master ' || t1 || ' with step-by-step notes',
+           s.id, 6 + n % 7, 1 + n % 4, 2020 + n % 6, true, n % 50 = 0,
+           jsonb_build_object('units', jsonb_build_array(
+               jsonb_build_object('title', initcap(t1), 'topics', jsonb_build_array(
+                   jsonb_build_object('title', 'Introduction to ' || t1, 'hours', 2),
+                   jsonb_build_object('title', initcap(t2) || ' in practice', 'hours', 3)))))
+    FROM generate_series(1, CAST(:products AS integer)) n
+    JOIN subjects s ON s.code = 'S' || (n % 10)
+    CROSS JOIN LATERAL (SELECT (CAST(:topics AS text[]))[1 + n % 26] AS t1,
+                               (CAST(:topics AS text[]))[1 + (n / 26) % 26] AS t2) t;
+
+    UPDATE products p SET search_vector =
+        setweight(to_tsvector('english', coalesce(p.title, '')), 'A') ||
+        setweight(to_tsvector('english', s.name), 'A') ||
+        setweight(to_tsvector('english', coalesce(p.short_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT string_agg(topic #>> '{}', ' ')
+             FROM jsonb_path_query(p.content_json, '$.units[*].topics[*].title') AS topic), '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(p.description, '')), 'C')
+    FROM subjects s WHERE s.id = p.subject_id;
+
+    CREATE INDEX ix_products_search_vector ON products USING gin (search_vector);
+    CREATE INDEX ix_products_title_trgm ON products USING gin (title public.gin_trgm_ops);
+    ANALYZE products;
+    ANALYZE subjects
+"""
+
+SEARCHES = ["algebra", "chemical bonding", "photosynthesis grade 10", "trigonometry functions", "trigonmetry"]
+
+
+async def execute_script(conn, script: str, **params):
+    for statement in script.split(";"):
+        if statement.strip():
+            await conn.execute(text(statement), params)
+
+
+async def time_search(conn, search: str, mode: str, repeat: int) -> tuple:
+    """Median ms for count + first page, and the number of matches."""
+    filters = product_filters(search=search, search_mode=mode)
+    rank = search_rank(search, mode)
+    page = select(Product.id).where(*filters).limit(20)
+    page = page.order_by(rank.desc(), Product.id) if rank is not None else page.order_by(
+        Product.grade, Product.term, Product.id
+    )
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        total = (await conn.execute(select(func.count()).select_from(Product).where(*filters))).scalar_one()
+        (await conn.execute(page)).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), total
+
+
+async def run(args) -> bool:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+            await execute_script(conn, TABLES)
+            for i, name in enumerate(SUBJECTS):
+                await conn.execute(
+                    text("INSERT INTO subjects VALUES (md5(:key)::uuid, :name, :code)"),
+                    {"key": f"s{i}", "name": name, "code": f"S{i}"},
+                )
+
+            print(f"[*] Seeding {args.products:,} products...")
+            await execute_script(conn, SEED, products=args.products, topics=TOPICS)
+
+            print(f"\n{'search':<28}{'mode':<10}{'matches':>9}{'median ms':>12}")
+            for search in SEARCHES:
+                for mode in ("ilike", "fts", "trigram"):
+                    ms, total = await time_search(conn, search, mode, args.repeat)
+                    print(f"{search:<28}{mode:<10}{total:>9}{ms:>12.2f}")
+        return True
+    except Exception as e:
+        print(f"[-] Benchmark failed: {e}")
+        return False
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema")
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Per-item cost of serializing catalog product cards, before and after
+pre-serialized JSON fragments.
+
+  pydantic   ProductResponse built per item, then validated and dumped
+             the way FastAPI handles a response_model (the old path)
+  orjson     product_dict() + orjson.dumps, i.e. a fragment cache miss
+  cached     fragments joined from ProductJSONCache (steady state)
+
+Runs on transient ORM objects, so no database is needed. Also checks
+that both paths produce the same JSON.
+
+Usage (from backend/):
+    python -m benchmarks.catalog_serialization
+    python -m benchmarks.catalog_serialization --products 500 --repeat 50
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import List
+import orjson
+from pydantic import TypeAdapter
+from app.api.v1.products import ProductResponse, SubjectResponse
+from app.models import Product, Subject
+from app.services.catalog_json import ProductJSONCache, product_dict, subject_dict
+
+
+def make_products(count: int) -> list:
+    subjects = [
+        Subject(id=uuid.uuid4(), name=name, code=name[:4].upper(), description=f"{name} study guides",
+                icon_url=f"https://cdn.example.com/icons/{i}.svg", color="#1A73E8")
+        for i, name in enumerate(["Mathematics", "Physical Sciences", "Life Sciences", "English", "Geography"])
+    ]
+    return [
+        Product(
+            id=uuid.uuid4(), sku=f"SKU-{n}", title=f"Study Guide {n}: Grade {6 + n % 7} Term {1 + n % 4}",
+            description="A CAPS-aligned study guide with worked examples, summaries and past papers. " * 3,
+            short_description="Step-by-step notes and exam practice", subject=subjects[n % len(subjects)],
+            grade=6 + n % 7, term=1 + n % 4, year=2026, price_zar=14900, sale_price_zar=9900 if n % 3 else None,
+            is_on_sale=bool(n % 3), thumbnail_url=f"https://cdn.example.com/thumbs/{n}.jpg",
+            preview_url=f"https://cdn.example.com/previews/{n}.pdf", total_pages=120, total_hours=40,
+            is_featured=n % 10 == 0, updated_at=datetime(2026, 1, 1),
+        )
+        for n in range(count)
+    ]
+
+
+ADAPTER = TypeAdapter(List[ProductResponse])
+
+
+def pydantic_path(products: list) -> bytes:
+    models = [
+        ProductResponse(**{**product_dict(p), "subject": SubjectResponse(**subject_dict(p.subject))})
+        for p in products
+    ]
+    # What FastAPI does with a response_model: validate, dump, json.dumps
+    content = ADAPTER.dump_python(ADAPTER.validate_python(models), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def orjson_path(products: list) -> bytes:
+    return b"[" + b",".join(orjson.dumps(product_dict(p)) for p in products) + b"]"
+
+
+def per_item_us(fn, products: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(products)
+        timings.append((time.perf_counter() - started) / len(products) * 1_000_000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    products = make_products(args.products)
+    cache = ProductJSONCache(maxsize=args.products, ttl=3600)
+    assert json.loads(pydantic_path(products)) == json.loads(cache.array(products)), "Outputs differ"
+
+    results = [
+        ("pydantic", per_item_us(pydantic_path, products, args.repeat)),
+        ("orjson", per_item_us(orjson_path, products, args.repeat)),
+        ("cached", per_item_us(cache.array, products, args.repeat)),
+    ]
+    baseline = results[0][1]
+    print(f"{args.products} products, median of {args.repeat} runs\n")
+    print(f"{'path':<12}{'us/item':>10}{'speedup':>10}")
+    for name, us in results:
+        print(f"{name:<12}{us:>10.2f}{baseline / us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Before/after query plans for the ownership and history indexes
+(alembic revision 002_ownership_indexes).
+
+Seeds a scratch schema with ~1M user_library rows plus orders, order
+items and chat sessions, runs each query shape under
+EXPLAIN (ANALYZE, BUFFERS) with only the initial schema's indexes, adds
+the new indexes and runs them again. The scratch schema is dropped
+afterwards unless --keep is given.
+
+Usage (from backend/):
+    python -m benchmarks.ownership_indexes
+    python -m benchmarks.ownership_indexes --users 50000 --products-per-user 20
+"""
+import argparse
+import asyncio
+import re
+import sys
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+
+SCHEMA = "bench_ownership"
+
+TABLES = """
+    CREATE TABLE user_library (
+        id uuid PRIMARY KEY, user_id uuid NOT NULL, product_id uuid NOT NULL,
+        order_id uuid NOT NULL, progress_percent int DEFAULT 0, purchased_at timestamp
+    );
+    CREATE TABLE orders (id uuid PRIMARY KEY, user_id uuid NOT NULL, total_zar int, created_at timestamp);
+    CREATE TABLE order_items (id uuid PRIMARY KEY, order_id uuid NOT NULL, product_id uuid, price_zar int);
+    CREATE TABLE chat_sessions (id uuid PRIMARY KEY, user_id uuid NOT NULL, topic text, started_at timestamp);
+    -- What 001_initial gives these tables
+    CREATE INDEX ix_user_library_user_id ON user_library (user_id);
+    CREATE INDEX ix_chat_sessions_user_id ON chat_sessions (user_id);
+"""
+
+# One order per (user, 5 products); ids are deterministic so queries can pick them
+SEED = """
+    INSERT INTO orders
+    SELECT md5('o' || u || '-' || o)::uuid, md5('u' || u)::uuid, 10000,
+           now() - (o || ' days')::interval
+    FROM generate_series(1, CAST(:users AS integer)) u, generate_series(0, CAST(:orders_per_user AS integer) - 1) o;
+
+    INSERT INTO user_library
+    SELECT md5('l' || u || '-' || p)::uuid, md5('u' || u)::uuid, md5('p' || p)::uuid,
+           md5('o' || u || '-' || (p / 5))::uuid, 0, now() - (p || ' days')::interval
+    FROM generate_series(1, CAST(:users AS integer)) u, generate_series(0, CAST(:products_per_user AS integer) - 1) p;
+
+    INSERT INTO order_items
+    SELECT md5('i' || u || '-' || p)::uuid, md5('o' || u || '-' || (p / 5))::uuid,
+           md5('p' || p)::uuid, 2000
+    FROM generate_series(1, CAST(:users AS integer)) u, generate_series(0, CAST(:products_per_user AS integer) - 1) p;
+
+    INSERT INTO chat_sessions
+    SELECT md5('c' || u || '-' || c)::uuid, md5('u' || u)::uuid, 'Topic',
+           now() - (c || ' hours')::interval
+    FROM generate_series(1, CAST(:users AS integer)) u, generate_series(0, 9) c;
+"""
+
+NEW_INDEXES = """
+    CREATE UNIQUE INDEX uq_user_library ON user_library (user_id, product_id);
+    CREATE INDEX ix_user_library_user_id_purchased_at ON user_library (user_id, purchased_at);
+    CREATE INDEX ix_order_items_order_id ON order_items (order_id);
+    CREATE INDEX ix_orders_user_id_created_at ON orders (user_id, created_at);
+    CREATE INDEX ix_chat_sessions_user_id_started_at ON chat_sessions (user_id, started_at);
+    DROP INDEX ix_user_library_user_id;
+    DROP INDEX ix_chat_sessions_user_id;
+"""
+
+# Query shapes from the routers, with ids of a user in the middle of the data
+QUERIES = {
+    "ownership check": """
+        SELECT * FROM user_library
+        WHERE user_id = md5('u12345')::uuid AND product_id = md5('p7')::uuid
+    """,
+    "library listing": """
+        SELECT * FROM user_library
+        WHERE user_id = md5('u12345')::uuid ORDER BY purchased_at DESC
+    """,
+    "order items": """
+        SELECT * FROM order_items WHERE order_id = md5('o12345-1')::uuid
+    """,
+    "order history": """
+        SELECT * FROM orders
+        WHERE user_id = md5('u12345')::uuid ORDER BY created_at DESC LIMIT 20
+    """,
+    "recent chat sessions": """
+        SELECT * FROM chat_sessions
+        WHERE user_id = md5('u12345')::uuid ORDER BY started_at DESC LIMIT 20
+    """,
+}
+
+
+async def execute_script(conn, script: str, **params):
+    for statement in script.split(";"):
+        if statement.strip():
+            await conn.execute(text(statement), params)
+
+
+async def explain_all(conn) -> dict:
+    """Run every query shape under EXPLAIN ANALYZE; returns name -> (plan, ms)."""
+    results = {}
+    for name, query in QUERIES.items():
+        rows = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"))).scalars().all()
+        plan = "\n".join(rows)
+        match = re.search(r"Execution Time: ([\d.]+) ms", plan)
+        results[name] = (plan, float(match.group(1)) if match else None)
+    return results
+
+
+def print_plans(title: str, results: dict):
+    print(f"\n[*] {title}")
+    for name, (plan, ms) in results.items():
+        print(f"\n--- {name} ({ms} ms)")
+        print(plan)
+
+
+async def run(args) -> bool:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+            await execute_script(conn, TABLES)
+
+            print(f"[*] Seeding {args.users * args.products_per_user:,} library rows...")
+            await execute_script(
+                conn, SEED,
+                users=args.users,
+                products_per_user=args.products_per_user,
+                orders_per_user=-(-args.products_per_user // 5),
+            )
+            await conn.execute(text("ANALYZE user_library, orders, order_items, chat_sessions"))
+            before = await explain_all(conn)
+
+            print("[*] Adding indexes from 002_ownership_indexes...")
+            await execute_script(conn, NEW_INDEXES)
+            await conn.execute(text("ANALYZE user_library, orders, order_items, chat_sessions"))
+            after = await explain_all(conn)
+
+        if args.verbose:
+            print_plans("Before", before)
+            print_plans("After", after)
+
+        print(f"\n{'query':<24}{'before ms':>12}{'after ms':>12}")
+        for name in QUERIES:
+            print(f"{name:<24}{before[name][1]:>12}{after[name][1]:>12}")
+            if not args.verbose:
+                print(f"    before: {before[name][0].splitlines()[0]}")
+                print(f"    after:  {after[name][0].splitlines()[0]}")
+        return True
+    except Exception as e:
+        print(f"[-] Benchmark failed: {e}")
+        return False
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--products-per-user", type=int, default=20)
+    parser.add_argument("--verbose", action="store_true", help="Print full plans")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema")
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Bulk-import learners for a school from a CSV file.
+
+Usage:
+    python import_learners.py learners.csv
+    python import_learners.py learners.csv --school-order-id <uuid>
+
+CSV columns: email, first_name, last_name, grade, password
+"""
+import argparse
+import asyncio
+import sys
+from sqlalchemy import select
+from app.core.database import async_session_maker, engine
+from app.models import SchoolOrder
+from app.services.learner_import import LearnerImportService
+
+
+async def run_import(args) -> bool:
+    async with async_session_maker() as db:
+        school_order = None
+        if args.school_order_id:
+            result = await db.execute(select(SchoolOrder).where(SchoolOrder.id == args.school_order_id))
+            school_order = result.scalar_one_or_none()
+            if not school_order:
+                print(f"[-] School order {args.school_order_id} not found")
+                return False
+            if school_order.payment_status != "paid":
+                print(f"[-] School order {args.school_order_id} has not been paid")
+                return False
+
+        print(f"[*] Importing learners from {args.csv_path}...")
+        service = LearnerImportService(batch_size=args.batch_size, hash_workers=args.workers)
+        try:
+            with open(args.csv_path, encoding="utf-8-sig", newline="") as csv_file:
+                report = await service.import_csv(db, csv_file, school_order)
+        finally:
+            service.shutdown()
+
+    await engine.dispose()
+
+    print(f"[+] Rows read:   {report.total_rows}")
+    print(f"    Created:     {report.created}")
+    print(f"    Duplicates:  {report.duplicates}")
+    print(f"    Licensed:    {report.licensed}")
+    print(f"    Failed:      {report.failed}")
+    print(f"    Throughput:  {report.rows_per_second} rows/s ({report.elapsed_seconds}s)")
+
+    if report.errors:
+        print("\n[!] Row errors:")
+        for error in report.errors:
+            print(f"    row {error.row} ({error.email or '-'}): {error.error}")
+
+    return report.failed == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import learners from a CSV file")
+    parser.add_argument("csv_path")
+    parser.add_argument("--school-order-id", help="Assign licenses from this school order")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Password hashing processes")
+    args = parser.parse_args()
+
+    success = asyncio.run(run_import(args))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Process queued payment notifications outside the API.
+
+Pair with PAYMENT_OUTBOX_WORKERS=0 on the API processes so webhooks are
+only recorded there, and run this as its own service.
+
+Usage:
+    python run_payment_outbox.py
+    python run_payment_outbox.py --workers 4
+"""
+import argparse
+import asyncio
+from app.core.config import settings
+from app.core.database import engine
+from app.services.payment_outbox import payment_outbox
+
+
+async def run_workers(workers: int):
+    payment_outbox.concurrency = workers
+    print(f"[*] Processing payment events with {workers} workers (Ctrl+C to stop)")
+    try:
+        await payment_outbox.run_forever()
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued payment notifications")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Concurrent workers (default: PAYMENT_OUTBOX_WORKERS, or 2 when that is 0)",
+    )
+    args = parser.parse_args()
+
+    workers = args.workers or settings.PAYMENT_OUTBOX_WORKERS or 2
+    try:
+        asyncio.run(run_workers(workers))
+    except KeyboardInterrupt:
+        print("[*] Stopped")
+
+
+if __name__ == "__main__":
+    main()
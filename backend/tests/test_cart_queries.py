@@ -0,0 +1,160 @@
+"""
+Query budgets for cart hydration: GET /cart and checkout must run the
+same, small number of statements whether the cart holds one item or many.
+
+Needs the Postgres at DATABASE_URL; skipped when it can't be reached.
+Run from backend/:  python -m pytest tests/test_cart_queries.py
+"""
+import uuid
+import httpx
+import pytest
+from sqlalchemy import delete, select, text
+from app.core.database import async_session_maker, engine, init_db
+from app.core.query_stats import query_budget
+from app.core.security import create_access_token
+from app.main import app
+from app.models import (
+    Bundle, Order, OrderItem, Product, PromoCode, Subject, User, UserRole, bundle_products
+)
+from app.services.cart_store import cart_store
+from app.services.catalog_cache import catalog_cache
+
+# products + subjects, bundles + product ids, promo code
+PRICING_QUERIES = 3
+# Checkout adds its single INSERT ... RETURNING for the order and items
+CHECKOUT_QUERIES = PRICING_QUERIES + 1
+
+
+async def database_available() -> bool:
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+
+
+async def seed(product_count: int, bundle_count: int) -> dict:
+    """A user, a subject, products, bundles of two products each, and a promo code."""
+    tag = uuid.uuid4().hex[:8]
+    async with async_session_maker() as db:
+        user = User(
+            id=uuid.uuid4(), email=f"cart-{tag}@example.com", password_hash="x",
+            role=UserRole.STUDENT, first_name="Cart", last_name="Test",
+        )
+        subject = Subject(id=uuid.uuid4(), name=f"Subject {tag}", code=f"T{tag}")
+        products = [
+            Product(
+                id=uuid.uuid4(), sku=f"T-{tag}-{n}", title=f"Guide {n}", subject_id=subject.id,
+                grade=10, term=1, year=2026, price_zar=10000, content_json={}, is_published=True,
+            )
+            for n in range(product_count + 2 * bundle_count)
+        ]
+        bundles = [
+            Bundle(id=uuid.uuid4(), sku=f"TB-{tag}-{n}", title=f"Bundle {n}", price_zar=15000, is_published=True)
+            for n in range(bundle_count)
+        ]
+        promo = PromoCode(id=uuid.uuid4(), code=f"T{tag}".upper(), discount_percent=10, is_active=True)
+        db.add_all([user, subject, *products, *bundles, promo])
+        await db.flush()
+        bundled = products[product_count:]
+        if bundles:
+            await db.execute(bundle_products.insert().values([
+                {"bundle_id": bundle.id, "product_id": bundled[2 * n + k].id}
+                for n, bundle in enumerate(bundles) for k in range(2)
+            ]))
+        await db.commit()
+        return {
+            "user_id": user.id,
+            "subject_id": subject.id,
+            "product_ids": [p.id for p in products],
+            "cart_product_ids": [p.id for p in products[:product_count]],
+            "bundle_ids": [b.id for b in bundles],
+            "promo_code": promo.code,
+            "promo_id": promo.id,
+        }
+
+
+async def cleanup(data: dict):
+    async with async_session_maker() as db:
+        order_ids = select(Order.id).where(Order.user_id == data["user_id"])
+        await db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+        await db.execute(delete(Order).where(Order.user_id == data["user_id"]))
+        await db.execute(bundle_products.delete().where(bundle_products.c.bundle_id.in_(data["bundle_ids"])))
+        await db.execute(delete(Bundle).where(Bundle.id.in_(data["bundle_ids"])))
+        await db.execute(delete(Product).where(Product.id.in_(data["product_ids"])))
+        await db.execute(delete(Subject).where(Subject.id == data["subject_id"]))
+        await db.execute(delete(PromoCode).where(PromoCode.id == data["promo_id"]))
+        await db.execute(delete(User).where(User.id == data["user_id"]))
+        await db.commit()
+    await cart_store.clear(data["user_id"])
+
+
+async def fill_cart(client: httpx.AsyncClient, data: dict):
+    for product_id in data["cart_product_ids"]:
+        response = await client.post("/api/v1/cart/items", json={"product_id": str(product_id)})
+        assert response.status_code == 200, response.text
+    for bundle_id in data["bundle_ids"]:
+        response = await client.post("/api/v1/cart/items", json={"bundle_id": str(bundle_id)})
+        assert response.status_code == 200, response.text
+    response = await client.post("/api/v1/cart/promo", json={"code": data["promo_code"]})
+    assert response.status_code == 200, response.text
+
+
+async def measure_cart(product_count: int, bundle_count: int) -> dict:
+    """Statement counts for GET /cart (snapshot and repriced) and checkout."""
+    data = await seed(product_count, bundle_count)
+    token = create_access_token(str(data["user_id"]))
+    transport = httpx.ASGITransport(app=app)
+    counts = {}
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}
+        ) as client:
+            await fill_cart(client, data)
+
+            # Served from the price snapshot; only the live promo lookup
+            with query_budget(1) as stats:
+                response = await client.get("/api/v1/cart")
+            assert response.status_code == 200, response.text
+            assert len(response.json()["items"]) == product_count + bundle_count
+            counts["snapshot"] = stats.count
+
+            # A catalog change makes the snapshot stale, so it is repriced
+            catalog_cache.invalidate()
+            with query_budget(PRICING_QUERIES) as stats:
+                response = await client.get("/api/v1/cart")
+            assert response.status_code == 200, response.text
+            assert response.json()["discount_zar"] > 0
+            counts["repriced"] = stats.count
+
+            with query_budget(CHECKOUT_QUERIES) as stats:
+                response = await client.post("/api/v1/cart/checkout", json={"payment_provider": "yoco"})
+            assert response.status_code == 200, response.text
+            counts["checkout"] = stats.count
+    finally:
+        await cleanup(data)
+    return counts
+
+
+@pytest.mark.asyncio
+async def test_cart_queries_do_not_grow_with_cart_size():
+    if not await database_available():
+        await engine.dispose()
+        pytest.skip("Postgres at DATABASE_URL is not reachable")
+    try:
+        await init_db()
+        one_item = await measure_cart(product_count=1, bundle_count=0)
+        many_items = await measure_cart(product_count=12, bundle_count=6)
+    finally:
+        await engine.dispose()
+
+    assert one_item["repriced"] <= PRICING_QUERIES
+    assert one_item["checkout"] <= CHECKOUT_QUERIES
+    # The bundle query only runs when there are bundles, so compare the
+    # many-item cart against the full budget rather than the one-item count
+    assert many_items == {
+        "snapshot": one_item["snapshot"],
+        "repriced": PRICING_QUERIES,
+        "checkout": CHECKOUT_QUERIES,
+    }
@@ -0,0 +1,74 @@
+"""
+PayFast ITN signature checks against a notification signed the way
+PayFast signs them: every posted field except `signature`, in the order
+received and blanks included, URL-encoded, then `&passphrase=...`.
+
+Run from backend/:  python -m pytest tests/test_payfast_signature.py
+"""
+import pytest
+from app.api.v1.cart import payfast_signature_valid
+from app.core.config import settings
+
+PASSPHRASE = "jt7NOE43FZPn"
+
+# Signed string:
+# m_payment_id=RUTA-20261017-0001&pf_payment_id=1089250&payment_status=COMPLETE
+# &item_name=RUTA+Study+Guide+Order+RUTA-20261017-0001&item_description=
+# &amount_gross=450.00&amount_fee=-10.35&amount_net=439.65&custom_str1=&custom_str2=
+# &custom_str3=&custom_str4=&custom_str5=&custom_int1=&custom_int2=&custom_int3=
+# &custom_int4=&custom_int5=&name_first=Thandi&name_last=
+# &email_address=thandi%40example.com&merchant_id=10000100&passphrase=jt7NOE43FZPn
+ITN = {
+    "m_payment_id": "RUTA-20261017-0001",
+    "pf_payment_id": "1089250",
+    "payment_status": "COMPLETE",
+    "item_name": "RUTA Study Guide Order RUTA-20261017-0001",
+    "item_description": "",
+    "amount_gross": "450.00",
+    "amount_fee": "-10.35",
+    "amount_net": "439.65",
+    "custom_str1": "",
+    "custom_str2": "",
+    "custom_str3": "",
+    "custom_str4": "",
+    "custom_str5": "",
+    "custom_int1": "",
+    "custom_int2": "",
+    "custom_int3": "",
+    "custom_int4": "",
+    "custom_int5": "",
+    "name_first": "Thandi",
+    "name_last": "",
+    "email_address": "thandi@example.com",
+    "merchant_id": "10000100",
+    "signature": "7b4cad2cb287a6ca45c8f4cc62d2d19c",
+}
+
+
+@pytest.fixture(autouse=True)
+def passphrase(monkeypatch):
+    monkeypatch.setattr(settings, "PAYFAST_PASSPHRASE", PASSPHRASE)
+
+
+def test_signature_with_blank_fields_is_valid():
+    assert payfast_signature_valid(dict(ITN))
+
+
+def test_tampered_field_is_rejected():
+    assert not payfast_signature_valid({**ITN, "amount_gross": "1.00"})
+
+
+def test_dropped_blank_field_is_rejected():
+    data = dict(ITN)
+    del data["custom_str1"]
+    assert not payfast_signature_valid(data)
+
+
+def test_field_order_matters():
+    data = {"pf_payment_id": ITN["pf_payment_id"], **ITN}
+    assert not payfast_signature_valid(data)
+
+
+def test_wrong_passphrase_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "PAYFAST_PASSPHRASE", "something-else")
+    assert not payfast_signature_valid(dict(ITN))